@@ -23,6 +23,88 @@ class ConfigVars(metaclass=Singleton):
         # Rapid API
         self.rapid_api_key = config["KEY"]["RAPID_API_KEY"]
         self.rapid_api_base_url = config["KEY"]["RAPID_API_BASE_URL"]
+        self.rapid_api_pool_size = config.getint(
+            "RAPID_API", "POOL_SIZE", fallback=20
+        )
+        self.rapid_api_timeout = config.getfloat("RAPID_API", "TIMEOUT", fallback=30)
+        self.rapid_api_max_concurrency = config.getint(
+            "RAPID_API", "MAX_CONCURRENCY", fallback=8
+        )
+        self.rapid_api_endpoint_concurrency = config.getint(
+            "RAPID_API", "ENDPOINT_CONCURRENCY", fallback=4
+        )
+        self.rate_limits = (
+            dict(config["RATE_LIMITS"]) if config.has_section("RATE_LIMITS") else {}
+        )
+
+        # Response cache
+        self.cache_backend = literal_eval(
+            config.get("CACHE", "BACKEND", fallback="'mongo'")
+        )
+        self.cache_dir = literal_eval(
+            config.get("CACHE", "DIRECTORY", fallback="'.cache/rapid_api'")
+        )
+        self.cache_ttls = (
+            dict(config["CACHE_TTLS"]) if config.has_section("CACHE_TTLS") else {}
+        )
+        self.freshness = (
+            dict(config["FRESHNESS"]) if config.has_section("FRESHNESS") else {}
+        )
+        self.lease_seconds = config.getfloat(
+            "SINGLE_FLIGHT", "LEASE_SECONDS", fallback=30
+        )
+
+        # Circuit breakers
+        self.circuit_breaker = {
+            "failure_rate": config.getfloat(
+                "CIRCUIT_BREAKER", "FAILURE_RATE", fallback=0.5
+            ),
+            "min_calls": config.getint("CIRCUIT_BREAKER", "MIN_CALLS", fallback=5),
+            "window": config.getint("CIRCUIT_BREAKER", "WINDOW", fallback=20),
+            "open_seconds": config.getfloat(
+                "CIRCUIT_BREAKER", "OPEN_SECONDS", fallback=30
+            ),
+        }
+
+        # Retries
+        self.retry = {
+            "max_attempts": config.getint("RETRY", "MAX_ATTEMPTS", fallback=4),
+            "base_delay": config.getfloat("RETRY", "BASE_DELAY", fallback=1),
+            "max_delay": config.getfloat("RETRY", "MAX_DELAY", fallback=30),
+            "run_budget": config.getint("RETRY", "RUN_BUDGET", fallback=200),
+        }
+
+        # Metering
+        self.query_budget = config.getfloat("METERING", "QUERY_BUDGET", fallback=0)
+        self.api_credits = (
+            dict(config["API_CREDITS"]) if config.has_section("API_CREDITS") else {}
+        )
+
+        # ICP rules
+        self.icp = {
+            "excluded_industries": literal_eval(
+                config.get(
+                    "ICP",
+                    "EXCLUDED_INDUSTRIES",
+                    fallback="['Staffing and Recruiting', 'Human Resources Services']",
+                )
+            ),
+            "min_staff": config.getint("ICP", "MIN_STAFF", fallback=None),
+            "max_staff": config.getint("ICP", "MAX_STAFF", fallback=200),
+            "min_founded_year": config.getint("ICP", "MIN_FOUNDED_YEAR", fallback=None),
+            "max_founded_year": config.getint("ICP", "MAX_FOUNDED_YEAR", fallback=None),
+        }
+
+        # Record / replay
+        self.cassette_mode = literal_eval(
+            config.get("CASSETTE", "MODE", fallback="'off'")
+        )
+        self.cassette_dir = literal_eval(
+            config.get("CASSETTE", "DIRECTORY", fallback="'cassettes'")
+        )
+        self.cassette_replay_url = literal_eval(
+            config.get("CASSETTE", "REPLAY_URL", fallback="'http://127.0.0.1:8765'")
+        )
 
         # GHL
         self.ghl_api_key = config["GHL"]["API_KEY"]
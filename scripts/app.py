@@ -118,6 +118,13 @@ with col3:
         "🏢 Onsite/Remote", ["-- None --", "onSite", "remote", "hybrid"]
     )
     onsite_remote_value = None if onsite_remote == "-- None --" else onsite_remote
+
+    credit_budget = st.number_input(
+        "💳 Credit budget (0 = unlimited)",
+        min_value=0,
+        value=int(ConfigVars().query_budget),
+        step=50,
+    )
     #     sort = st.selectbox("🔽 Sort By", ["mostRelevant", "mostRecent"])
 
     # Snov Lead List
@@ -139,7 +146,11 @@ with col3:
 
         if new_list_name:
             if st.button("Create and Use This List"):
-                response = Snov().create_prospect_list(name=new_list_name)
+                try:
+                    response = Snov().create_prospect_list(name=new_list_name)
+                except Exception as e:
+                    logger.error(f"Could not create Snov list {new_list_name}: {e}")
+                    response = {}
                 if response.get("success"):
                     list_id = response["data"]["id"]
                     st.success(f"✅ Created new list: {new_list_name} (ID: {list_id})")
@@ -217,6 +228,7 @@ if search_clicked:
         "industry": {"description": selected_industry, "id": industry_id},
         "job_function": {"description": selected_function, "id": function_id},
         "status": "Inprogress",
+        "credit_budget": credit_budget,
         "query_id": str(uuid.uuid4()),
     }
 
@@ -245,4 +257,5 @@ if search_clicked:
         sort=sort,
         query_data=prepared_query_data,
         snov_lead_list=list_id,
+        credit_budget=credit_budget,
     )
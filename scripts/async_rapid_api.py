@@ -0,0 +1,285 @@
+"""
+This scripts is the asyncio counterpart of the Rapid API client, used to fan
+out many lookups at once with bounded concurrency.
+"""
+
+import sys
+import os
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, List, Iterable, Tuple, Callable, AsyncIterator
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from config.singleton import Singleton
+from config.configuration_vars import ConfigVars
+from scripts.rapid_api import RapidAPI
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncRapidAPI(metaclass=Singleton):
+    """
+    An asyncio wrapper around the RapidAPI singleton.
+
+    Every call is dispatched to a worker thread that goes through the shared
+    pooled session and per-endpoint rate limiter of RapidAPI, so pacing stays
+    global. Concurrency is capped both overall and per endpoint, across every
+    thread and event loop of the process.
+    """
+
+    def __init__(self) -> None:
+        """Initialize concurrency caps from configuration."""
+        config = ConfigVars()
+        self.client: RapidAPI = RapidAPI()
+        self.max_concurrency: int = config.rapid_api_max_concurrency
+        self.endpoint_concurrency: int = config.rapid_api_endpoint_concurrency
+        # Every ``run`` call starts a fresh loop, and pipelines call it from
+        # several threads at once, so the caps are thread semaphores held by
+        # the worker threads rather than asyncio ones bound to a loop.
+        self._global_limit = threading.BoundedSemaphore(self.max_concurrency)
+        self._endpoint_limits: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def run(coro):
+        """
+        Run a coroutine to completion from synchronous code.
+
+        Args:
+            coro: Coroutine to execute.
+
+        Returns:
+            Any: The coroutine's result.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coro)
+
+        # Already inside an event loop (e.g. a notebook): use a helper thread
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            return pool.submit(asyncio.run, coro).result()
+
+    def _endpoint_limit(self, endpoint: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            if endpoint not in self._endpoint_limits:
+                self._endpoint_limits[endpoint] = threading.BoundedSemaphore(
+                    self.endpoint_concurrency
+                )
+            return self._endpoint_limits[endpoint]
+
+    def _call_limited(
+        self, endpoint: str, method: Callable[..., Any], *args, **kwargs
+    ) -> Optional[Dict[str, Any]]:
+        # The endpoint slot is taken first, so a call waiting on a busy
+        # endpoint does not hold one of the global slots
+        with self._endpoint_limit(endpoint), self._global_limit:
+            return method(*args, **kwargs)
+
+    async def _call(
+        self, endpoint: str, method: Callable[..., Any], *args, **kwargs
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Run a blocking RapidAPI method in a worker thread under the caps.
+
+        Args:
+            endpoint (str): Endpoint the method calls, used for the per-endpoint cap.
+            method (Callable): Bound RapidAPI method.
+
+        Returns:
+            Optional[Dict[str, Any]]: The method's result, or None if it raised.
+        """
+        try:
+            return await asyncio.to_thread(
+                self._call_limited, endpoint, method, *args, **kwargs
+            )
+        except Exception as e:
+            logger.warning(f"Async call to {endpoint} failed: {e}")
+            return None
+
+    # ----------------------------- Endpoints ----------------------------- #
+
+    async def search_jobs(self, **filters) -> Optional[Dict[str, Any]]:
+        """Async version of RapidAPI.search_jobs."""
+        return await self._call("/search-jobs", self.client.search_jobs, **filters)
+
+    async def get_hiring_team(
+        self, job_id: str, job_url: str
+    ) -> Optional[Dict[str, Any]]:
+        """Async version of RapidAPI.get_hiring_team."""
+        return await self._call(
+            "/get-hiring-team", self.client.get_hiring_team, job_id, job_url
+        )
+
+    async def search_people(
+        self, keywords: str, company: str
+    ) -> Optional[Dict[str, Any]]:
+        """Async version of RapidAPI.search_people."""
+        return await self._call(
+            "/search-people",
+            self.client.search_people,
+            keywords=keywords,
+            company=company,
+        )
+
+    async def get_linkedin_profile_data_by_url(
+        self, profile_url: str
+    ) -> Optional[Dict[str, Any]]:
+        """Async version of RapidAPI.get_linkedin_profile_data_by_url."""
+        return await self._call(
+            "/get-profile-data-by-url",
+            self.client.get_linkedin_profile_data_by_url,
+            profile_url,
+        )
+
+    async def get_linkedin_posts_by_username(
+        self, username: str
+    ) -> Optional[Dict[str, Any]]:
+        """Async version of RapidAPI.get_linkedin_posts_by_username."""
+        return await self._call(
+            "/get-profile-posts", self.client.get_linkedin_posts_by_username, username
+        )
+
+    async def get_linkedin_profile_comments(
+        self, username: str
+    ) -> Optional[Dict[str, Any]]:
+        """Async version of RapidAPI.get_linkedin_profile_comments."""
+        return await self._call(
+            "/get-profile-comments", self.client.get_linkedin_profile_comments, username
+        )
+
+    async def get_linkedin_company_details_by_id(
+        self, company_id: int
+    ) -> Optional[Dict[str, Any]]:
+        """Async version of RapidAPI.get_linkedin_company_details_by_id."""
+        return await self._call(
+            "/get-company-details-by-id",
+            self.client.get_linkedin_company_details_by_id,
+            company_id,
+        )
+
+    async def get_linkedin_company_details_by_username(
+        self, username: str
+    ) -> Optional[Dict[str, Any]]:
+        """Async version of RapidAPI.get_linkedin_company_details_by_username."""
+        return await self._call(
+            "/get-company-details",
+            self.client.get_linkedin_company_details_by_username,
+            username,
+        )
+
+    async def get_company_posts_by_username(
+        self, username: str
+    ) -> Optional[Dict[str, Any]]:
+        """Async version of RapidAPI.get_company_posts_by_username."""
+        return await self._call(
+            "/get-company-posts", self.client.get_company_posts_by_username, username
+        )
+
+    # --------------------------- Batch helpers --------------------------- #
+
+    @staticmethod
+    async def _gather(keys: Iterable[Any], factory: Callable[[Any], Any]) -> Dict:
+        keys = list(dict.fromkeys(keys))  # de-duplicate, keep order
+        results = await asyncio.gather(*(factory(key) for key in keys))
+        return dict(zip(keys, results))
+
+    async def gather_jobs(
+        self, keywords: List[str], **filters
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Search jobs for several keywords concurrently.
+
+        Args:
+            keywords (List[str]): Keywords to search for.
+            **filters: Filters forwarded to search_jobs.
+
+        Returns:
+            Dict[str, Optional[Dict[str, Any]]]: Search response per keyword.
+        """
+        return await self._gather(
+            keywords, lambda kw: self.search_jobs(keywords=kw, **filters)
+        )
+
+    async def iter_jobs(
+        self, keywords: Iterable[str], **filters
+    ) -> AsyncIterator[Tuple[str, Optional[Dict[str, Any]]]]:
+        """
+        Search jobs for several keywords concurrently, yielding each response
+        as soon as it arrives rather than in keyword order.
+
+        Args:
+            keywords (Iterable[str]): Keywords to search for.
+            **filters: Filters forwarded to search_jobs (including ``start``).
+
+        Yields:
+            Tuple[str, Optional[Dict[str, Any]]]: (keyword, search response).
+        """
+
+        async def search(kw):
+            return kw, await self.search_jobs(keywords=kw, **filters)
+
+        for next_done in asyncio.as_completed(
+            [search(kw) for kw in dict.fromkeys(keywords)]
+        ):
+            yield await next_done
+
+    async def gather_hiring_teams(
+        self, jobs: Iterable[Tuple[str, str]]
+    ) -> Dict[Tuple[str, str], Optional[Dict[str, Any]]]:
+        """
+        Fetch hiring teams for several jobs concurrently.
+
+        Args:
+            jobs (Iterable[Tuple[str, str]]): (job_id, job_url) pairs.
+
+        Returns:
+            Dict[Tuple[str, str], Optional[Dict[str, Any]]]: Response per job.
+        """
+        return await self._gather(jobs, lambda job: self.get_hiring_team(*job))
+
+    async def gather_profiles(
+        self, urls: Iterable[str]
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Fetch LinkedIn profiles for several URLs concurrently.
+
+        Args:
+            urls (Iterable[str]): LinkedIn profile URLs.
+
+        Returns:
+            Dict[str, Optional[Dict[str, Any]]]: Profile data per URL.
+        """
+        return await self._gather(urls, self.get_linkedin_profile_data_by_url)
+
+    async def gather_posts(
+        self, usernames: Iterable[str]
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Fetch the latest posts of several users concurrently.
+
+        Args:
+            usernames (Iterable[str]): LinkedIn usernames.
+
+        Returns:
+            Dict[str, Optional[Dict[str, Any]]]: Post data per username.
+        """
+        return await self._gather(usernames, self.get_linkedin_posts_by_username)
+
+    async def gather_companies(
+        self, usernames: Iterable[str]
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Fetch company details for several company usernames concurrently.
+
+        Args:
+            usernames (Iterable[str]): LinkedIn company usernames.
+
+        Returns:
+            Dict[str, Optional[Dict[str, Any]]]: Company details per username.
+        """
+        return await self._gather(
+            usernames, self.get_linkedin_company_details_by_username
+        )
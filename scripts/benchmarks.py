@@ -0,0 +1,264 @@
+"""
+This script benchmarks the data-shaping hot paths of the pipelines on
+synthetic payloads shaped like RapidAPI responses.
+
+Usage:
+    python scripts/benchmarks.py jobs --size 50000
+    python scripts/benchmarks.py profiles --size 10000
+"""
+
+import sys
+import os
+import time
+import random
+import logging
+import argparse
+
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from scripts.helper_functions import HelperFunctions
+from scripts.mongo_client import MongoDBClient
+from scripts.jobs_pipeline import JobFetcherPipeline
+
+logger = logging.getLogger(__name__)
+
+
+def best_of(fn, repeat=3):
+    """
+    Time a function and keep the fastest run.
+
+    Returns:
+        tuple: (seconds of the fastest run, result of the last run).
+    """
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def synthetic_jobs(size, seed=7):
+    """Build ``size`` raw job postings shaped like /search-jobs results."""
+    rng = random.Random(seed)
+    jobs = []
+    for i in range(size):
+        username = f"company-{rng.randrange(size // 5 or 1)}"
+        company_url = f"https://www.linkedin.com/company/{username}/"
+        if rng.random() < 0.3:
+            company_url += "life"
+        jobs.append(
+            {
+                "id": str(4_000_000_000 + i),
+                "title": rng.choice(["Data Engineer", "Product Manager", "SRE"]),
+                "url": f"https://www.linkedin.com/jobs/view/{4_000_000_000 + i}/",
+                "referenceId": f"ref-{i}",
+                "posterId": str(rng.randrange(10**6)),
+                "company": {
+                    "name": username.replace("-", " ").title(),
+                    "logo": f"https://media.licdn.com/{username}.png",
+                    "url": company_url if rng.random() > 0.02 else None,
+                },
+                "location": rng.choice(["London", "Berlin", "Remote"]),
+                "type": "Full-time",
+                "postDate": "2025-06-01T00:00:00.000Z",
+                "postedTimestamp": 1_748_736_000_000 + i * 1000,
+                "benefits": "",
+            }
+        )
+    return jobs
+
+
+def legacy_clean_jobs(jobs_raw):
+    """The per-job flatten_dict path clean_and_filter_jobs used before."""
+    helper = HelperFunctions()
+    jobs_df = pd.DataFrame([helper.flatten_dict(job) for job in jobs_raw])
+    jobs_df.rename(columns={"id": "job_id"}, inplace=True)
+    clean_jobs = jobs_df.dropna(subset=["company_url"]).reset_index(drop=True)
+    clean_jobs["company_username"] = clean_jobs["company_url"].str.extract(
+        r"/company/([^/]+)/"
+    )
+    clean_jobs["linkedinUrl"] = clean_jobs["company_url"].str.replace(
+        r"/life$", "", regex=True
+    )
+    return clean_jobs
+
+
+def benchmark_jobs(size=50_000, repeat=3):
+    """Compare the legacy and columnar job normalization on ``size`` jobs."""
+    jobs_raw = synthetic_jobs(size)
+    pipeline = JobFetcherPipeline(mongo_client=MongoDBClient())
+
+    legacy_time, legacy_df = best_of(lambda: legacy_clean_jobs(jobs_raw), repeat)
+    columnar_time, columnar_df = best_of(
+        lambda: pipeline.clean_and_filter_jobs(jobs_raw), repeat
+    )
+
+    pd.testing.assert_frame_equal(
+        legacy_df.sort_index(axis=1), columnar_df.sort_index(axis=1)
+    )
+    logger.info(f"Job normalization on {size} jobs (best of {repeat})")
+    logger.info(f"  flatten_dict per job : {legacy_time:.3f}s")
+    logger.info(f"  columnar             : {columnar_time:.3f}s")
+    logger.info(f"  speed-up             : {legacy_time / columnar_time:.1f}x")
+    return legacy_time, columnar_time
+
+
+def synthetic_profiles(size, seed=7):
+    """Build ``size`` raw profiles shaped like /get-profile-data-by-url results."""
+    rng = random.Random(seed)
+    profiles = []
+    for i in range(size):
+        positions = [
+            {
+                "companyId": rng.randrange(10**6),
+                "companyName": f"Company {rng.randrange(size)}",
+                "companyUsername": f"company-{i}-{p}",
+                "companyURL": f"https://www.linkedin.com/company/company-{i}-{p}/",
+                "companyLogo": "",
+                "companyIndustry": rng.choice(["Software", "Staffing", "Retail"]),
+                "companyStaffCountRange": rng.choice(["11 - 50", "51 - 200"]),
+                "title": rng.choice(["Talent Partner", "CTO", "HR Manager"]),
+                "location": rng.choice(["London", "Berlin"]),
+                "description": "Responsible for hiring." * rng.randrange(1, 4),
+                "employmentType": "Full-time",
+                "start": {"year": 2015 + p, "month": 1, "day": 0},
+                "end": (
+                    {"year": 0, "month": 0, "day": 0}
+                    if p == 0
+                    else {"year": 2016 + p, "month": 6, "day": 0}
+                ),
+            }
+            for p in range(rng.randrange(0, 6))
+        ]
+        profiles.append(
+            {
+                "id": i,
+                "profileURL": f"https://www.linkedin.com/in/person-{i}/",
+                "company_name": f"Company {i % 500}",
+                "username": f"person-{i}",
+                "firstName": "Alex",
+                "lastName": f"Person{i}",
+                "headline": "Talent Acquisition",
+                "geo": {
+                    "country": "United Kingdom",
+                    "city": "London",
+                    "full": "London, England, United Kingdom",
+                    "countryCode": "gb",
+                },
+                "educations": [{"schoolName": "University"}],
+                "position": positions[:1],
+                "fullPositions": positions,
+                "skills": [{"name": f"Skill {s}"} for s in range(rng.randrange(8))],
+                "summary": "Hiring great people.",
+                "volunteering": [],
+            }
+        )
+    return profiles
+
+
+def legacy_process_profiles(profiles_df):
+    """The row-wise path process_profiles used before."""
+    helper = HelperFunctions()
+    selected = [
+        "id",
+        "profileURL",
+        "company_name",
+        "username",
+        "firstName",
+        "lastName",
+        "headline",
+        "geo",
+        "educations",
+        "position",
+        "fullPositions",
+        "skills",
+        "summary",
+        "volunteering",
+    ]
+    final = profiles_df[[col for col in selected if col in profiles_df.columns]].copy()
+    final["processed_fullPositions"] = (
+        final["fullPositions"].dropna().apply(helper.process_full_positions)
+    )
+    final["latest_experience"] = final.apply(
+        lambda row: helper.find_relevant_experience(
+            row["processed_fullPositions"], None
+        ),
+        axis=1,
+    )
+    final = pd.concat(
+        [
+            final.drop(columns=["latest_experience", "geo"], errors="ignore"),
+            pd.json_normalize(final["latest_experience"]),
+            pd.json_normalize(final["geo"]),
+        ],
+        axis=1,
+    )
+    final["clean_skills"] = final["skills"].apply(helper.process_skills)
+    final.rename(
+        columns={"company_name": "company", "full": "full_address"}, inplace=True
+    )
+    drop_cols = [
+        "start.year",
+        "start.month",
+        "start.day",
+        "end.year",
+        "end.month",
+        "end.day",
+        "educations",
+        "position",
+        "fullPositions",
+        "skills",
+        "volunteering",
+        "id",
+        "country",
+        "city",
+        "countryCode",
+    ]
+    final.drop(columns=[col for col in drop_cols if col in final.columns], inplace=True)
+    return final
+
+
+def benchmark_profiles(size=10_000, repeat=3):
+    """Compare the row-wise and single-pass profile processing on ``size`` profiles."""
+    profiles_df = pd.DataFrame(synthetic_profiles(size))
+
+    legacy_time, legacy_df = best_of(lambda: legacy_process_profiles(profiles_df), repeat)
+    single_pass_time, single_pass_df = best_of(
+        lambda: HelperFunctions.flatten_profiles(profiles_df), repeat
+    )
+
+    pd.testing.assert_frame_equal(
+        legacy_df.sort_index(axis=1), single_pass_df.sort_index(axis=1)
+    )
+    logger.info(f"Profile processing on {size} profiles (best of {repeat})")
+    logger.info(f"  row-wise    : {legacy_time:.3f}s")
+    logger.info(f"  single pass : {single_pass_time:.3f}s")
+    logger.info(f"  speed-up    : {legacy_time / single_pass_time:.1f}x")
+    return legacy_time, single_pass_time
+
+
+BENCHMARKS = {
+    "jobs": benchmark_jobs,
+    "profiles": benchmark_profiles,
+}
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        handlers=[logging.StreamHandler(sys.stdout)],
+    )
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("--size", type=int, default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    kwargs = {"repeat": args.repeat}
+    if args.size:
+        kwargs["size"] = args.size
+    BENCHMARKS[args.benchmark](**kwargs)
@@ -0,0 +1,197 @@
+"""
+This script contains the record/replay cassette used to capture exchanges with
+RapidAPI, Snov.io and Bedrock and to serve them back offline.
+"""
+
+import sys
+import os
+import json
+import hashlib
+import inspect
+import logging
+import functools
+import threading
+from typing import Dict, Any, Optional, Callable
+
+import requests
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from config.singleton import Singleton
+from config.configuration_vars import ConfigVars
+
+logger = logging.getLogger(__name__)
+
+
+class CassetteStore:
+    """
+    Stores exchanges as JSON files under ``<directory>/<provider>/<operation>/``.
+
+    An exchange is identified by provider, operation and normalized params, so
+    the client recording it and the stand-in server replaying it compute the
+    same key independently.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+
+    @staticmethod
+    def normalize_params(params: Dict[str, Any]) -> Dict[str, str]:
+        """Drop None values and compare everything else as strings."""
+        return {
+            name: str(value)
+            for name, value in sorted(params.items())
+            if value is not None
+        }
+
+    @classmethod
+    def key(cls, provider: str, operation: str, params: Dict[str, Any]) -> str:
+        """
+        Build the identity of an exchange.
+
+        Args:
+            provider (str): "rapidapi", "snov" or "bedrock".
+            operation (str): Endpoint or method name, without a leading slash.
+            params (Dict[str, Any]): Request parameters.
+
+        Returns:
+            str: Hex digest identifying the exchange.
+        """
+        raw = json.dumps(
+            [provider, operation, cls.normalize_params(params)], sort_keys=True
+        )
+        return hashlib.sha256(raw.encode("UTF-8")).hexdigest()
+
+    def _path(self, provider: str, operation: str, key: str) -> str:
+        folder = operation.strip("/").replace("/", "_") or "root"
+        return os.path.join(self.directory, provider, folder, f"{key}.json")
+
+    def save(
+        self, provider: str, operation: str, params: Dict[str, Any], response: Any
+    ) -> None:
+        """Write an exchange to the store, replacing any earlier recording."""
+        key = self.key(provider, operation, params)
+        path = self._path(provider, operation, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        exchange = {
+            "provider": provider,
+            "operation": operation,
+            "params": self.normalize_params(params),
+            "response": response,
+        }
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="UTF-8") as tape:
+            json.dump(exchange, tape, default=str)
+        os.replace(tmp_path, path)
+
+    def load(
+        self, provider: str, operation: str, params: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Read a recorded exchange.
+
+        Returns:
+            Optional[Dict[str, Any]]: The exchange, or None if it was never recorded.
+        """
+        key = self.key(provider, operation, params)
+        try:
+            with open(self._path(provider, operation, key), encoding="UTF-8") as tape:
+                return json.load(tape)
+        except (OSError, ValueError):
+            return None
+
+
+class Cassette(metaclass=Singleton):
+    """
+    Records exchanges with external APIs or replays them from a stand-in server.
+
+    The mode is set with ``MODE`` ("off", "record" or "replay") in the optional
+    [CASSETTE] section of the secrets file, alongside ``DIRECTORY`` and the
+    ``REPLAY_URL`` of the server started with scripts/replay_server.py.
+    """
+
+    def __init__(self) -> None:
+        config = ConfigVars()
+        self.mode: str = config.cassette_mode
+        self.replay_url: str = config.cassette_replay_url.rstrip("/")
+        self.store = CassetteStore(config.cassette_dir)
+        self.session = requests.Session()
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def record(
+        self, provider: str, operation: str, params: Dict[str, Any], response: Any
+    ) -> None:
+        """Save an exchange when recording; failures are logged, never raised."""
+        if not self.recording:
+            return
+        try:
+            self.store.save(provider, operation.lstrip("/"), params, response)
+        except Exception as e:
+            logger.warning(f"Could not record {provider} {operation}: {e}")
+
+    def replay(self, provider: str, operation: str, params: Dict[str, Any]) -> Any:
+        """
+        Fetch a recorded response from the stand-in server.
+
+        Raises:
+            requests.HTTPError: On injected 429s or exchanges missing from the cassette.
+        """
+        response = self.session.post(
+            f"{self.replay_url}/{provider}/{operation.lstrip('/')}",
+            data=json.dumps({"params": params}, default=str),
+            headers={"Content-Type": "application/json"},
+            timeout=60,
+        )
+        response.raise_for_status()
+        return response.json()["response"]
+
+
+def cassette(
+    provider: str, operation: Optional[str] = None, placeholder: Any = None
+) -> Callable:
+    """
+    Decorator routing a client method through the cassette.
+
+    Arguments the method was called with (minus ``self``) form the exchange
+    params. Methods returning credentials pass a ``placeholder``: their result
+    is never recorded and the placeholder is returned when replaying.
+
+    Args:
+        provider (str): Provider name used in the cassette.
+        operation (Optional[str]): Operation name; defaults to the method name.
+        placeholder (Any): Value returned on replay instead of a recording.
+    """
+
+    def decorator(fn: Callable) -> Callable:
+        signature = inspect.signature(fn)
+        name = operation or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            tape = Cassette()
+            if tape.mode == "off":
+                return fn(*args, **kwargs)
+
+            if placeholder is not None:
+                return placeholder if tape.replaying else fn(*args, **kwargs)
+
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            params = {k: v for k, v in bound.arguments.items() if k != "self"}
+
+            if tape.replaying:
+                return tape.replay(provider, name, params)
+
+            result = fn(*args, **kwargs)
+            tape.record(provider, name, params, result)
+            return result
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,186 @@
+"""
+This script contains the circuit breakers that make calls to a degraded
+external API fail fast instead of waiting and retrying.
+"""
+
+import sys
+import os
+import time
+import logging
+import functools
+import threading
+from collections import deque
+from typing import Dict, Callable, Optional
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from config.singleton import Singleton
+from config.configuration_vars import ConfigVars
+from scripts.metering import BudgetExceeded
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because its circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    A rolling-window circuit breaker for one endpoint or operation.
+
+    The circuit opens once the error rate over the last ``window`` calls
+    reaches ``failure_rate`` (after at least ``min_calls``). While open, calls
+    are rejected. After ``open_seconds`` it lets ``half_open_probes`` calls
+    through: a success closes the circuit, a failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float = 0.5,
+        min_calls: int = 5,
+        window: int = 20,
+        open_seconds: float = 30,
+        half_open_probes: int = 1,
+    ) -> None:
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.state = self.CLOSED
+        self._outcomes = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """
+        Decide whether a call may go out now.
+
+        Returns:
+            bool: False while the circuit is open (or all probes are taken).
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.open_seconds:
+                    return False
+                self.state = self.HALF_OPEN
+                self._probes_in_flight = 0
+                logger.info(f"Circuit {self.name} half-open, probing upstream")
+
+            if self._probes_in_flight < self.half_open_probes:
+                self._probes_in_flight += 1
+                return True
+            return False
+
+    def release(self) -> None:
+        """
+        Give back an admitted call that never reached the upstream, e.g. one
+        rejected by the credit budget, without counting it either way.
+        """
+        with self._lock:
+            if self.state == self.HALF_OPEN and self._probes_in_flight > 0:
+                self._probes_in_flight -= 1
+
+    def record_success(self) -> None:
+        """Record a healthy call, closing the circuit after a good probe."""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                logger.info(f"Circuit {self.name} closed, upstream recovered")
+                self.state = self.CLOSED
+                self._outcomes.clear()
+            self._outcomes.append(True)
+
+    def record_failure(self) -> None:
+        """Record a failed call, opening the circuit if the budget is spent."""
+        with self._lock:
+            self._outcomes.append(False)
+            if self.state == self.HALF_OPEN:
+                self._open()
+                return
+
+            failures = self._outcomes.count(False)
+            if (
+                len(self._outcomes) >= self.min_calls
+                and failures / len(self._outcomes) >= self.failure_rate
+            ):
+                self._open()
+
+    def _open(self) -> None:
+        self.state = self.OPEN
+        self._opened_at = time.monotonic()
+        logger.warning(
+            f"Circuit {self.name} opened; failing fast for {self.open_seconds}s"
+        )
+
+
+class CircuitBreakerRegistry(metaclass=Singleton):
+    """
+    Holds one circuit breaker per endpoint or operation name.
+
+    Thresholds come from the optional [CIRCUIT_BREAKER] section of the secrets
+    file (FAILURE_RATE, MIN_CALLS, WINDOW, OPEN_SECONDS).
+    """
+
+    def __init__(self) -> None:
+        self.settings = ConfigVars().circuit_breaker
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> CircuitBreaker:
+        """Return the breaker for a name, creating it on first use."""
+        with self._lock:
+            if name not in self._breakers:
+                self._breakers[name] = CircuitBreaker(name, **self.settings)
+            return self._breakers[name]
+
+    def states(self) -> Dict[str, str]:
+        """Return the current state of every breaker."""
+        with self._lock:
+            return {name: b.state for name, b in self._breakers.items()}
+
+
+def circuit_breaker(provider: str, operation: Optional[str] = None) -> Callable:
+    """
+    Decorator guarding a client method with the breaker ``<provider>:<operation>``.
+
+    Any exception raised by the method counts as a failure, except
+    BudgetExceeded, raised by an inner ``@metered`` before anything is sent.
+    While the circuit is open the method is not called and CircuitOpenError is
+    raised instead, so rejected calls are never metered.
+
+    Args:
+        provider (str): Provider name, e.g. "snov" or "bedrock".
+        operation (Optional[str]): Operation name; defaults to the method name.
+    """
+
+    def decorator(fn: Callable) -> Callable:
+        name = f"{provider}:{operation or fn.__name__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            breaker = CircuitBreakerRegistry().get(name)
+            if not breaker.allow():
+                raise CircuitOpenError(f"Circuit {name} is open")
+            try:
+                result = fn(*args, **kwargs)
+            except BudgetExceeded:
+                breaker.release()
+                raise
+            except Exception:
+                breaker.record_failure()
+                raise
+            breaker.record_success()
+            return result
+
+        return wrapper
+
+    return decorator
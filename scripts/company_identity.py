@@ -0,0 +1,236 @@
+"""
+This script contains the canonical company identity index that maps every
+way a company is referred to (LinkedIn username, company URL, companyId and
+name) to one record, so the same company is never fetched twice.
+"""
+
+import sys
+import os
+import re
+import logging
+from datetime import datetime
+from typing import Dict, Any, Optional, Iterable, List
+
+import pandas as pd
+from pymongo import UpdateOne
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+logger = logging.getLogger(__name__)
+
+
+class CompanyIdentity:
+    """
+    Company aliases stored in ``CompanyIdentity``, one document per companyId.
+
+    Each document keeps the canonical ``linkedinUrl`` and ``name`` of the
+    company and the normalized aliases it is known by: ``slug:<username>``
+    (LinkedIn company URLs and usernames normalize to the same slug),
+    ``id:<companyId>`` and ``name:<casefolded name>``. Records are updated on
+    every company fetch and resolved before calling RapidAPI.
+    """
+
+    COLLECTION = "CompanyIdentity"
+    ALIAS_KINDS = ("username", "url", "id", "name")
+    COMPANY_URL_PATTERN = re.compile(r"linkedin\.com/company/([^/?#]+)", re.I)
+
+    def __init__(self, mongo_client) -> None:
+        self.collection = mongo_client.get_collection(self.COLLECTION)
+
+    @classmethod
+    def alias(cls, kind: str, value: Any) -> Optional[str]:
+        """
+        Normalize one way of referring to a company.
+
+        Args:
+            kind (str): "username", "url", "id" or "name".
+            value (Any): The username, URL, companyId or name.
+
+        Returns:
+            Optional[str]: The alias, or None if the value cannot identify a company.
+        """
+        if value is None or (isinstance(value, float) and pd.isna(value)):
+            return None
+        value = str(value).strip()
+        if kind == "url":
+            match = cls.COMPANY_URL_PATTERN.search(value)
+            value, kind = (match.group(1) if match else ""), "username"
+        if not value:
+            return None
+        if kind == "username":
+            return f"slug:{value.lower()}"
+        if kind == "id":
+            return f"id:{value[:-2] if value.endswith('.0') else value}"
+        if kind == "name":
+            return f"name:{' '.join(value.split()).casefold()}"
+        raise ValueError(f"Unknown company alias kind '{kind}'")
+
+    @classmethod
+    def aliases_of(cls, company: Dict[str, Any], **known: Any) -> List[str]:
+        """
+        Collect the aliases of a company details record.
+
+        Args:
+            company (Dict[str, Any]): /get-company-details data, or a RawCompany
+                document (``companyId`` instead of ``id``).
+            **known: Extra aliases by kind, e.g. the username it was fetched by.
+        """
+        company_id = company.get("companyId", company.get("id"))
+        candidates = [
+            ("id", company_id),
+            ("username", company.get("universalName")),
+            ("url", company.get("linkedinUrl")),
+            ("name", company.get("name")),
+            *known.items(),
+        ]
+        aliases = {cls.alias(kind, value) for kind, value in candidates}
+        aliases.discard(None)
+        return sorted(aliases)
+
+    def record(self, companies: Iterable[Dict[str, Any]], **known: Any) -> None:
+        """
+        Add the aliases of fetched companies to their identity records.
+
+        Args:
+            companies (Iterable[Dict[str, Any]]): Company details records.
+            **known: Extra aliases shared by all records (only meaningful when
+                recording a single company).
+        """
+        now = datetime.utcnow().isoformat()
+        operations = []
+        for company in companies:
+            company_id = company.get("companyId", company.get("id"))
+            if self.alias("id", company_id) is None:
+                continue
+            operations.append(
+                UpdateOne(
+                    {"_id": self.alias("id", company_id)},
+                    {
+                        "$set": {
+                            "companyId": company_id,
+                            "linkedinUrl": company.get("linkedinUrl"),
+                            "name": company.get("name"),
+                            "message_date": now,
+                        },
+                        "$addToSet": {
+                            "aliases": {"$each": self.aliases_of(company, **known)}
+                        },
+                    },
+                    upsert=True,
+                )
+            )
+        if not operations:
+            return
+        try:
+            self.collection.bulk_write(operations, ordered=False)
+        except Exception as e:
+            logger.warning(f"Could not record company identities: {e}")
+
+    def resolve(self, kind: str, values: Iterable[Any]) -> Dict[Any, Dict[str, Any]]:
+        """
+        Look up the identity records of companies referred to one way.
+
+        Args:
+            kind (str): "username", "url", "id" or "name".
+            values (Iterable[Any]): Values of that kind.
+
+        Returns:
+            Dict[Any, Dict[str, Any]]: {value: {"companyId", "linkedinUrl",
+            "name"}} for the values with a known identity. Values matching
+            several companies (e.g. a shared name) are left unresolved.
+        """
+        by_alias = {}
+        for value in values:
+            alias = self.alias(kind, value)
+            if alias:
+                by_alias.setdefault(alias, []).append(value)
+        if not by_alias:
+            return {}
+
+        try:
+            docs = list(
+                self.collection.find(
+                    {"aliases": {"$in": list(by_alias)}},
+                    {
+                        "_id": 0,
+                        "companyId": 1,
+                        "linkedinUrl": 1,
+                        "name": 1,
+                        "aliases": 1,
+                    },
+                )
+            )
+        except Exception as e:
+            logger.warning(f"Could not resolve company identities: {e}")
+            return {}
+
+        matches = {}
+        for doc in docs:
+            for alias in doc.pop("aliases", []):
+                for value in by_alias.get(alias, []):
+                    matches.setdefault(value, {})[
+                        self.alias("id", doc.get("companyId"))
+                    ] = doc
+
+        resolved = {}
+        for value, companies in matches.items():
+            if len(companies) > 1:
+                logger.info(f"'{value}' matches {len(companies)} companies, unresolved")
+                continue
+            resolved[value] = next(iter(companies.values()))
+        return resolved
+
+    def resolve_job_companies(self, jobs_df: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+        """
+        Look up the identity records of the companies jobs are posted by.
+
+        Companies are resolved by their LinkedIn company URL first; only those
+        it does not identify fall back to their name, which must then match a
+        single company.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: {company_name: {"companyId",
+            "linkedinUrl", "name"}} for the companies with a known identity.
+        """
+        if jobs_df.empty or "company_name" not in jobs_df:
+            return {}
+
+        jobs = jobs_df.dropna(subset=["company_name"]).drop_duplicates(
+            subset=["company_name"]
+        )
+        resolved = {}
+        if "linkedinUrl" in jobs:
+            by_url = self.resolve("url", jobs["linkedinUrl"].dropna().unique())
+            for name, url in zip(jobs["company_name"], jobs["linkedinUrl"]):
+                if url in by_url:
+                    resolved[name] = by_url[url]
+
+        unresolved = [name for name in jobs["company_name"] if name not in resolved]
+        resolved.update(self.resolve("name", unresolved))
+        return resolved
+
+    def canonicalize_jobs(self, jobs_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Point jobs at the canonical linkedinUrl and name of their companies.
+
+        Jobs can refer to a company by a numeric or outdated company URL; once
+        the company is known, the canonical URL lets the company pipeline find
+        it in RawCompany instead of fetching it again.
+        """
+        if jobs_df.empty or "linkedinUrl" not in jobs_df:
+            return jobs_df
+
+        resolved = self.resolve("url", jobs_df["linkedinUrl"].dropna().unique())
+        if not resolved:
+            return jobs_df
+
+        jobs_df = jobs_df.copy()
+        identities = jobs_df["linkedinUrl"].map(resolved)
+        known = identities.notna()
+        for column, field in (("linkedinUrl", "linkedinUrl"), ("company_name", "name")):
+            if column in jobs_df:
+                canonical = identities[known].map(lambda doc: doc.get(field))
+                jobs_df.loc[known, column] = canonical.where(
+                    canonical.notna(), jobs_df.loc[known, column]
+                )
+        return jobs_df
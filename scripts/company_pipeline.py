@@ -19,19 +19,40 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from config.singleton import Singleton
 from scripts.insert_data_in_db import InsertData
 from scripts.helper_functions import HelperFunctions
-from scripts.rapid_api import RapidAPI
+from scripts.async_rapid_api import AsyncRapidAPI
+from scripts.icp_filter import ICPFilter
+from scripts.freshness import FreshnessPolicy
+from scripts.company_identity import CompanyIdentity
 
 
 logger = logging.getLogger(__name__)
 
 
 class CompanyFetcherPipeline:
+    CONSUMES = ("jobs",)
+    PRODUCES = ("companies",)
+
+    # Raw fields dropped before companies are cleaned, so never loaded back
+    RAW_ONLY_COLUMNS = [
+        "Images",
+        "isClaimable",
+        "backgroundCoverImages",
+        "logos",
+        "callToAction",
+        "followerCount",
+        "featuredCustomers",
+        "pageVerification",
+    ]
+
     def __init__(self, mongo_client, status=None):
         self.client = mongo_client
         self.raw_collection = self.client.get_collection("RawCompany")
         self.clean_collection = self.client.get_collection("Company")
         self.helper = HelperFunctions()
         self.inserter = InsertData()
+        self.icp = ICPFilter()
+        self.freshness = FreshnessPolicy()
+        self.identity = CompanyIdentity(mongo_client)
         self.status = status
 
     def log_progress(self, message):
@@ -40,94 +61,173 @@ class CompanyFetcherPipeline:
         else:
             print(message)
 
-    def fetch_existing_companies(self):
-        existing_docs = list(self.raw_collection.find({}, {"_id": 0}))
+    def fetch_existing_urls(self, linkedin_urls):
+        """
+        Return the candidate LinkedIn URLs already stored in RawCompany.
+
+        Returns:
+            dict: {linkedinUrl: message_date of the last fetch}.
+        """
+        linkedin_urls = list(linkedin_urls)
+        if not linkedin_urls:
+            return {}
+        cursor = self.raw_collection.find(
+            {"linkedinUrl": {"$in": linkedin_urls}},
+            {"_id": 0, "linkedinUrl": 1, "message_date": 1},
+        )
+        return {
+            doc["linkedinUrl"]: doc.get("message_date")
+            for doc in cursor
+            if doc.get("linkedinUrl")
+        }
+
+    def fetch_existing_companies(self, linkedin_urls, icp_only=True):
+        """
+        Load the stored companies matching the candidate LinkedIn URLs.
+
+        Uses the linkedinUrl index and leaves out the raw-only fields that
+        clean_company_data would drop anyway. With ``icp_only`` the ICP rules
+        are pushed down into the query, so companies that cannot fit are
+        never loaded.
+        """
+        linkedin_urls = list(linkedin_urls)
+        if not linkedin_urls:
+            return pd.DataFrame()
+
+        query = {"linkedinUrl": {"$in": linkedin_urls}}
+        if icp_only:
+            query.update(self.icp.mongo_query())
+        projection = {"_id": 0, **{col: 0 for col in self.RAW_ONLY_COLUMNS}}
+        existing_docs = list(self.raw_collection.find(query, projection))
         return pd.DataFrame(existing_docs)
 
-    def find_missing_companies(self, jobs_df, existing_df):
+    def find_missing_companies(self, jobs_df, existing_df, existing_urls=None):
+        """
+        Split the jobs' companies into loaded ones and ones never fetched.
+
+        ``existing_urls`` lists every stored company, including those left
+        out of ``existing_df`` by the ICP pushdown, so they are not refetched.
+        """
         if jobs_df.empty:
             return pd.DataFrame(), pd.DataFrame()
 
         new_urls = set(jobs_df["linkedinUrl"].dropna().unique())
-        existing_urls = set(existing_df["linkedinUrl"].dropna().unique())
+        if existing_urls is None:
+            existing_urls = (
+                set(existing_df["linkedinUrl"].dropna().unique())
+                if "linkedinUrl" in existing_df
+                else set()
+            )
 
         present = new_urls & existing_urls
         missing = new_urls - existing_urls
 
-        already_present = existing_df[
-            existing_df["linkedinUrl"].isin(present)
-        ].reset_index(drop=True)
+        already_present = (
+            existing_df[existing_df["linkedinUrl"].isin(present)].reset_index(
+                drop=True
+            )
+            if present and "linkedinUrl" in existing_df
+            else pd.DataFrame()
+        )
         not_present = jobs_df[jobs_df["linkedinUrl"].isin(missing)].reset_index(
             drop=True
         )
         return already_present, not_present
 
-    def fetch_company_data(self, usernames):
+    def fetch_company_data(self, usernames, log=None):
+        log = log or self.log_progress
+        async_api = AsyncRapidAPI()
+        responses = async_api.run(async_api.gather_companies(usernames))
+
         results = []
-        for username in usernames:
+        for username, data in responses.items():
             try:
-                data = RapidAPI().get_linkedin_company_details_by_username(username)
                 company_data = data.get("data")
                 if company_data:  # Only append if not None
+                    self.identity.record([company_data], username=username)
                     results.append(company_data)
                 else:
-                    self.log_progress(f"⚠️ No data found for '{username}'")
+                    log(f"⚠️ No data found for '{username}'")
             except Exception as e:
-                self.log_progress(f"❌ Error fetching company '{username}': {e}")
+                log(f"❌ Error fetching company '{username}': {e}")
 
         if results:
             return pd.DataFrame(results).dropna(how="all").reset_index(drop=True)
         else:
             return pd.DataFrame()
 
-    def parse_staff_range(self, range_str):
-        try:
-            if "+" in range_str:
-                return pd.Series([0, int(range_str.replace("+", ""))])
-            lower, upper = map(int, range_str.split("-"))
-            return pd.Series([lower, upper])
-        except Exception:
-            return pd.Series([None, None])
+    def store_raw_companies(self, company_df):
+        """Upsert fetched companies with the staff bounds the ICP pushdown uses."""
+        company_df.rename(columns={"id": "companyId"}, inplace=True)
+        company_df = self.icp.add_staff_bounds(company_df)
+        self.inserter.insert_or_upsert_to_mongo(
+            self.client, "RawCompany", self.inserter.prepare_data(company_df)
+        )
+        return company_df
+
+    def refresh_companies(self, usernames):
+        """Refetch stale companies off the main thread and store them."""
+        company_df = self.fetch_company_data(usernames, log=logger.info)
+        if not company_df.empty:
+            self.store_raw_companies(company_df)
 
     def clean_company_data(self, df):
-        drop_cols = [
-            "Images",
-            "isClaimable",
-            "backgroundCoverImages",
-            "logos",
-            "callToAction",
-            "followerCount",
-            "featuredCustomers",
-            "pageVerification",
-        ]
-        df.drop(columns=drop_cols, inplace=True, errors="ignore")
+        df.drop(columns=self.RAW_ONLY_COLUMNS, inplace=True, errors="ignore")
 
         if "founded" in df:
             founded_df = pd.json_normalize(df["founded"])
             df.drop(columns=["founded"], inplace=True)
             df = df.join(founded_df.rename(columns={"year": "founded_year"}))
 
-        if "staffCountRange" in df:
-            df[["lower_limit", "upper_limit"]] = df["staffCountRange"].apply(
-                self.parse_staff_range
-            )
-        return df
+        return self.icp.add_staff_bounds(df)
 
     def run(self, jobs_df):
         self.log_progress("🚀 Starting company data pipeline...")
 
-        # Step 1: Fetch from DB
-        existing_df = self.fetch_existing_companies()
+        # Step 1: Fetch the candidate companies already in the DB
+        candidate_urls = (
+            jobs_df["linkedinUrl"].dropna().unique() if not jobs_df.empty else []
+        )
+        states = self.freshness.split(
+            "company", self.fetch_existing_urls(candidate_urls)
+        )
+        usable_urls = set(states[FreshnessPolicy.FRESH]) | set(
+            states[FreshnessPolicy.STALE]
+        )
+        existing_df = self.fetch_existing_companies(
+            [url for url in candidate_urls if url in usable_urls]
+        )
+
+        # Stale companies are served now and refetched in the background
+        if states[FreshnessPolicy.STALE]:
+            stale_usernames = (
+                jobs_df.loc[
+                    jobs_df["linkedinUrl"].isin(states[FreshnessPolicy.STALE]),
+                    "company_username",
+                ]
+                .dropna()
+                .unique()
+            )
+            self.freshness.refresh_in_background(
+                "company", stale_usernames, self.refresh_companies
+            )
 
-        # Step 2: Find missing vs present
-        already_present, not_present = self.find_missing_companies(jobs_df, existing_df)
-        # Step 3: Fetch new company data
+        # Step 2: Find missing (or expired) vs present
+        already_present, not_present = self.find_missing_companies(
+            jobs_df, existing_df, usable_urls
+        )
+        # Companies stored before the identity index existed are added to it
+        if not already_present.empty:
+            self.identity.record(already_present.to_dict(orient="records"))
+        # Step 3: Fetch new company data and store it in RawCompany; companies
+        # served from the DB are not rewritten, so message_date stays the
+        # time of the last fetch
         if not not_present.empty:
             usernames = not_present["company_username"].dropna().unique()
             new_company_df = self.fetch_company_data(usernames)
 
             if new_company_df is not None and not new_company_df.empty:
-                new_company_df.rename(columns={"id": "companyId"}, inplace=True)
+                new_company_df = self.store_raw_companies(new_company_df)
                 full_df = pd.concat(
                     [already_present, new_company_df], ignore_index=True
                 )
@@ -136,36 +236,14 @@ class CompanyFetcherPipeline:
         else:
             full_df = already_present.copy()
 
-        # Step 4: Merge and insert into RawCompany
+        # Step 4: Clean and filter the merged companies
         if not full_df.empty:
-            self.inserter.insert_or_upsert_to_mongo(
-                self.client, "RawCompany", self.inserter.prepare_data(full_df)
-            )
-
             # Step 5: Clean for final company DB
             full_df_cleaned = self.clean_company_data(full_df)
 
             if not full_df_cleaned.empty:
-                EXCLUDED_INDUSTRIES = {
-                    "Staffing and Recruiting",
-                    "Human Resources Services",
-                }
-
-                def should_keep(industries):
-                    if not isinstance(industries, list):
-                        return True
-                    return not any(ind in EXCLUDED_INDUSTRIES for ind in industries)
-
-                full_df_cleaned = full_df_cleaned[
-                    full_df_cleaned["industries"].apply(should_keep)
-                ].reset_index(drop=True)
-
                 # Step 6: Filter ICP-fit companies
-                icp_fit = (
-                    full_df_cleaned[full_df_cleaned["upper_limit"] <= 200]
-                    .copy()
-                    .reset_index(drop=True)
-                )
+                icp_fit = self.icp.apply(full_df_cleaned).copy()
 
                 if not icp_fit.empty:
                     # Step 7: Insert into production company collection
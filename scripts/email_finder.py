@@ -17,6 +17,10 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from config.configuration_vars import ConfigVars
 from config.singleton import Singleton
+from scripts.cassette import cassette
+from scripts.circuit_breaker import circuit_breaker
+from scripts.retry_policy import with_retries
+from scripts.metering import metered, BudgetExceeded
 
 logger = logging.getLogger(__name__)
 
@@ -26,7 +30,23 @@ class SnovEmailFinder(metaclass=Singleton):
     This class contains function that help in finding email ids of prospets.
     """
 
+    # Pipeline data read when looking up emails
+    CONSUMES = ("people",)
+
+    # Columns of the frame returned by collect_emails_from_linkedin_urls
+    EMAIL_COLUMNS = [
+        "profileURL",
+        "name",
+        "firstName",
+        "lastName",
+        "emails",
+        "currentJob_position",
+        "currentJob_site",
+        "domain",
+    ]
+
     @staticmethod
+    @cassette("snov", placeholder="cassette-token")
     def get_access_token():
         """
         Generate Access Token for Snov.io API
@@ -40,6 +60,10 @@ class SnovEmailFinder(metaclass=Singleton):
         response = requests.post(url, data=data)
         return response.json()["access_token"]
 
+    @with_retries("snov")
+    @circuit_breaker("snov")
+    @metered("snov")
+    @cassette("snov")
     def emails_by_domain_by_name_search(self, first_name, last_name, domain):
         """ "
         Finding email ids using first_name, last_name, and company domain
@@ -64,9 +88,14 @@ class SnovEmailFinder(metaclass=Singleton):
             data=payload,
             headers=headers,
         )
+        res.raise_for_status()
 
         return json.loads(res.text)
 
+    @with_retries("snov")
+    @circuit_breaker("snov")
+    @metered("snov")
+    @cassette("snov")
     def emails_by_domain_by_name_result(self, task_hash):
         """
         Get email id result data
@@ -82,6 +111,7 @@ class SnovEmailFinder(metaclass=Singleton):
             params=params,
             headers=headers,
         )
+        res.raise_for_status()
 
         return json.loads(res.text)
 
@@ -157,24 +187,36 @@ class SnovEmailFinder(metaclass=Singleton):
 
             return unpacked
 
+        except BudgetExceeded:
+            raise
         except Exception as e:
             # You can also log this if running in production
             print("Error finding email: %s", e)
             return None
 
+    @with_retries("snov")
+    @circuit_breaker("snov")
+    @metered("snov")
+    @cassette("snov")
     def add_url_for_search(self, url):
         token = self.get_access_token()
         params = {"access_token": token, "url": url}
 
         res = requests.post("https://api.snov.io/v1/add-url-for-search", data=params)
+        res.raise_for_status()
 
         return json.loads(res.text)
 
+    @with_retries("snov")
+    @circuit_breaker("snov")
+    @metered("snov")
+    @cassette("snov")
     def get_emails_from_url(self, url):
         token = self.get_access_token()
         params = {"access_token": token, "url": url}
 
         res = requests.post("https://api.snov.io/v1/get-emails-from-url", data=params)
+        res.raise_for_status()
 
         return json.loads(res.text)
 
@@ -278,6 +320,9 @@ class SnovEmailFinder(metaclass=Singleton):
             try:
                 result_df = self.find_email_from_name_and_domain(first, last, domain)
                 results.append(result_df)
+            except BudgetExceeded as e:
+                logger.warning(f"{e}, skipping the remaining email searches")
+                break
             except Exception:
                 continue
 
@@ -339,13 +384,17 @@ class SnovEmailFinder(metaclass=Singleton):
                 flattened["profileURL"] = linkedin_url
                 email_records.append(flattened)
                 # logger.info(f"Email data fetched for {linkedin_url}, {flattened}")
+            except BudgetExceeded as e:
+                logger.warning(f"{e}, skipping the remaining LinkedIn URLs")
+                break
             except Exception as e:
                 if logger:
                     logger.error(f"Error processing URL {linkedin_url}: {e}")
                 continue
 
         if not email_records:
-            return pd.DataFrame()
+            # Keep the columns callers select, so an empty batch flows through
+            return pd.DataFrame(columns=self.EMAIL_COLUMNS)
 
         email_df = pd.DataFrame(email_records)
 
@@ -14,6 +14,7 @@ from config.singleton import Singleton
 from scripts.emails_prompt import EmailSequence
 from scripts.helper_functions import HelperFunctions
 from scripts.llm import ClaudeAIResponse
+from scripts.metering import BudgetExceeded
 
 
 class GetEmailSequence(metaclass=Singleton):
@@ -21,6 +22,10 @@ class GetEmailSequence(metaclass=Singleton):
     This class is used to generate email sequence.
     """
 
+    # Pipeline data read by generate_email_sequence; add "posts" here if the
+    # recent-posts block is enabled again
+    CONSUMES = ("people", "jobs")
+
     @staticmethod
     def extract_between_tags(tag: str, string: str, strip: bool = False) -> List[str]:
         """
@@ -201,6 +206,9 @@ class GetEmailSequence(metaclass=Singleton):
                 emails_df["LinkedIn URL"] = profile_url
                 emails_dataframe.append(emails_df)
 
+            except BudgetExceeded as e:
+                print(f"{e}, skipping the remaining email sequences")
+                break
             except Exception as e:
                 print(
                     f"Error generating email for {row.get('firstName', '')} {row.get('lastName', '')}: {e}"
@@ -0,0 +1,157 @@
+"""
+This script contains the freshness policy that decides whether cached
+companies, profiles, posts and hiring teams can be served as they are,
+served while being refreshed in the background, or must be refetched.
+"""
+
+import sys
+import os
+import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, Future
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, Callable, Iterable, List, Tuple
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from config.singleton import Singleton
+from config.configuration_vars import ConfigVars
+
+logger = logging.getLogger(__name__)
+
+
+class FreshnessPolicy(metaclass=Singleton):
+    """
+    Per-entity freshness windows.
+
+    Each entity type has two ages, in days: data younger than the first is
+    ``fresh`` and served as is; data younger than the second is ``stale``,
+    served at once and refreshed in the background; anything older (or
+    never fetched) is ``expired`` and must be refetched before use. Windows
+    can be overridden in the optional [FRESHNESS] section, e.g.
+    ``company = "30, 180"``.
+    """
+
+    FRESH = "fresh"
+    STALE = "stale"
+    EXPIRED = "expired"
+
+    DEFAULT_WINDOWS: Dict[str, Tuple[float, float]] = {
+        "company": (30, 180),
+        "profile": (14, 90),
+        "posts": (3, 30),
+        "hiring_team": (1, 7),
+    }
+
+    # Background refreshes run on a small pool so they never starve the run
+    REFRESH_WORKERS = 2
+
+    def __init__(self) -> None:
+        self.windows = dict(self.DEFAULT_WINDOWS)
+        for entity, value in ConfigVars().freshness.items():
+            try:
+                fresh, usable = [float(v) for v in value.strip("\"' ").split(",")]
+                self.windows[entity.lower()] = (fresh, usable)
+            except ValueError:
+                logger.warning(f"Ignoring invalid freshness window '{entity} = {value}'")
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.REFRESH_WORKERS, thread_name_prefix="refresh"
+        )
+        self._in_flight = set()
+        self._lock = threading.Lock()
+
+    def window(self, entity: str) -> Tuple[timedelta, timedelta]:
+        """Return the (fresh, usable) ages of an entity type."""
+        fresh, usable = self.windows[entity]
+        return timedelta(days=fresh), timedelta(days=usable)
+
+    def cutoff(self, entity: str) -> str:
+        """Oldest ``message_date`` (ISO string) that is still usable."""
+        _, usable = self.window(entity)
+        return (datetime.utcnow() - usable).isoformat()
+
+    def state_for_age(self, entity: str, age: Optional[timedelta]) -> str:
+        """Classify data of a given age; None means it was never fetched."""
+        if age is None:
+            return self.EXPIRED
+        fresh, usable = self.window(entity)
+        if age <= fresh:
+            return self.FRESH
+        if age <= usable:
+            return self.STALE
+        return self.EXPIRED
+
+    def state(self, entity: str, message_date: Any) -> str:
+        """
+        Classify a stored record by its ``message_date``.
+
+        Args:
+            entity (str): "company", "profile", "posts" or "hiring_team".
+            message_date (Any): ISO string or datetime of the last fetch.
+
+        Returns:
+            str: FRESH, STALE or EXPIRED.
+        """
+        if isinstance(message_date, str):
+            try:
+                message_date = datetime.fromisoformat(message_date)
+            except ValueError:
+                message_date = None
+        if not isinstance(message_date, datetime):
+            return self.EXPIRED
+        return self.state_for_age(entity, datetime.utcnow() - message_date)
+
+    def split(
+        self, entity: str, dates: Dict[Any, Any]
+    ) -> Dict[str, List[Any]]:
+        """
+        Group keys by the state of their ``message_date``.
+
+        Args:
+            entity (str): Entity type.
+            dates (Dict[Any, Any]): {key: message_date} of stored records.
+
+        Returns:
+            Dict[str, List[Any]]: {FRESH: [...], STALE: [...], EXPIRED: [...]}.
+        """
+        groups = {self.FRESH: [], self.STALE: [], self.EXPIRED: []}
+        for key, message_date in dates.items():
+            groups[self.state(entity, message_date)].append(key)
+        return groups
+
+    def refresh_in_background(
+        self, entity: str, keys: Iterable[Any], refresh: Callable[[List[Any]], Any]
+    ) -> Optional[Future]:
+        """
+        Refresh stale records without blocking the caller.
+
+        Keys already being refreshed are skipped. ``refresh`` runs on a worker
+        thread with the caller's context (so API usage is still charged to the
+        current query) and must not touch Streamlit.
+
+        Args:
+            entity (str): Entity type, used to track in-flight keys.
+            keys (Iterable[Any]): Keys of the stale records.
+            refresh (Callable): Called with the list of keys to refresh.
+
+        Returns:
+            Optional[Future]: The scheduled refresh, or None if nothing to do.
+        """
+        with self._lock:
+            keys = [key for key in keys if (entity, key) not in self._in_flight]
+            self._in_flight.update((entity, key) for key in keys)
+        if not keys:
+            return None
+
+        def run():
+            try:
+                refresh(keys)
+                logger.info(f"Refreshed {len(keys)} stale {entity} records")
+            except Exception as e:
+                logger.warning(f"Background refresh of {entity} failed: {e}")
+            finally:
+                with self._lock:
+                    self._in_flight.difference_update((entity, key) for key in keys)
+
+        context = contextvars.copy_context()
+        return self._executor.submit(context.run, run)
@@ -25,6 +25,9 @@ class HelperFunctions(metaclass=Singleton):
     often retrieved in string or complex dictionary/list formats.
     """
 
+    # Pipeline data read by get_questionnaire_data
+    QUESTIONNAIRE_CONSUMES = ("jobs", "companies", "people", "posts")
+
     @staticmethod
     def flatten_dict(d, parent_key="", sep="_"):
         items = []
@@ -36,6 +39,159 @@ class HelperFunctions(metaclass=Singleton):
                 items.append((new_key, v))
         return dict(items)
 
+    @staticmethod
+    def normalize_records(records, sep="_"):
+        """
+        Flatten a list of nested dicts into a DataFrame column by column.
+
+        Produces the same columns and values as building a DataFrame from
+        flatten_dict of every record, but only the columns that hold dicts are
+        expanded, each with one DataFrame constructor call, instead of walking
+        every record in Python.
+        """
+        if not records:
+            return pd.DataFrame()
+        return HelperFunctions._expand_nested_columns(pd.DataFrame(records), sep)
+
+    @staticmethod
+    def _expand_nested_columns(frame, sep="_"):
+        pieces = []
+        for col in frame.columns:
+            values = frame[col]
+            if values.dtype != object:
+                pieces.append(values)
+                continue
+
+            is_dict = [type(value) is dict for value in values]
+            if not any(is_dict):
+                pieces.append(values)
+                continue
+
+            nested = pd.DataFrame(
+                [value if d else {} for value, d in zip(values, is_dict)],
+                index=frame.index,
+            )
+            nested = HelperFunctions._expand_nested_columns(nested, sep)
+            nested.columns = [f"{col}{sep}{name}" for name in nested.columns]
+
+            # Records where the key holds a plain value keep it under the key
+            scalars = values.where([not d for d in is_dict])
+            if scalars.notna().any():
+                pieces.append(scalars.infer_objects())
+            pieces.append(nested)
+
+        if not pieces:
+            return pd.DataFrame(index=frame.index)
+        return pd.concat(pieces, axis=1)
+
+    @staticmethod
+    def normalize_jobs(jobs_raw):
+        """
+        Flatten raw job postings into a DataFrame in a single columnar pass,
+        with the job ``id`` renamed to ``job_id``.
+        """
+        jobs_df = HelperFunctions.normalize_records(jobs_raw)
+        return jobs_df.rename(columns={"id": "job_id"})
+
+    # Profile fields kept as they are in the People collection
+    PROFILE_FIELDS = [
+        "profileURL",
+        "username",
+        "firstName",
+        "lastName",
+        "headline",
+        "summary",
+    ]
+
+    # Experience and geo fields left out of the People collection
+    PROFILE_DROPPED_FIELDS = {
+        "start.year",
+        "start.month",
+        "start.day",
+        "end.year",
+        "end.month",
+        "end.day",
+        "id",
+        "country",
+        "city",
+        "countryCode",
+    }
+
+    @staticmethod
+    def _flatten_profile_field(row, value, prefix=""):
+        """Add a nested dict to ``row`` with json_normalize's dotted keys."""
+        for key, item in value.items():
+            name = f"{prefix}{key}" if prefix else key
+            if type(item) is dict:
+                HelperFunctions._flatten_profile_field(row, item, f"{name}.")
+            elif name not in HelperFunctions.PROFILE_DROPPED_FIELDS:
+                row["full_address" if name == "full" else name] = item
+
+    @staticmethod
+    def _latest_position(positions):
+        """find_relevant_experience without a target company, on processed positions."""
+        for position in positions:
+            end = position["end"] or {}
+            if (
+                end.get("year", 0) in (0, None)
+                and end.get("month", 0) in (0, None)
+                and end.get("day", 0) in (0, None)
+            ):
+                return position
+        return positions[0] if positions else None
+
+    @staticmethod
+    def flatten_profiles(profiles_df, company_column="company_name"):
+        """
+        Turn raw profiles into the final People columns in a single pass.
+
+        Gives the columns the row-wise process_full_positions /
+        find_relevant_experience / json_normalize / process_skills steps did:
+        the kept profile fields, ``company``, ``processed_fullPositions``, the
+        fields of the latest experience, the geo fields (``full`` as
+        ``full_address``) and ``clean_skills``. Only the nested columns are
+        walked in Python, each profile once.
+
+        Args:
+            profiles_df (pd.DataFrame): Raw profiles.
+            company_column (str): Column holding the prospect's company.
+
+        Returns:
+            pd.DataFrame: One row per profile.
+        """
+        fields = list(HelperFunctions.PROFILE_FIELDS)
+        fields.insert(1, company_column)
+        kept = [name for name in fields if name in profiles_df.columns]
+        final = profiles_df[kept].rename(columns={company_column: "company"})
+        final = final.reset_index(drop=True)
+
+        def column(name):
+            if name in profiles_df.columns:
+                return profiles_df[name].tolist()
+            return [None] * len(profiles_df)
+
+        processed_positions, nested_rows = [], []
+        for positions, geo in zip(column("fullPositions"), column("geo")):
+            row = {}
+            if positions is None or (type(positions) is float and pd.isna(positions)):
+                processed_positions.append(float("nan"))
+            else:
+                processed = HelperFunctions.process_full_positions(positions)
+                processed_positions.append(processed)
+                experience = HelperFunctions._latest_position(processed)
+                if experience:
+                    HelperFunctions._flatten_profile_field(row, experience)
+            if type(geo) is dict:
+                HelperFunctions._flatten_profile_field(row, geo)
+            nested_rows.append(row)
+
+        final["processed_fullPositions"] = processed_positions
+        final = pd.concat([final, pd.DataFrame(nested_rows)], axis=1)
+        final["clean_skills"] = [
+            HelperFunctions.process_skills(skills) for skills in column("skills")
+        ]
+        return final
+
     @staticmethod
     def find_relevant_experience(experiences, target_company=None):
         if isinstance(experiences, str):
@@ -0,0 +1,164 @@
+"""
+This script contains the ICP (ideal customer profile) filter applied to
+companies, evaluated over whole DataFrame columns or pushed down to Mongo.
+"""
+
+import sys
+import os
+import re
+import logging
+from typing import Dict, Any
+
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from config.singleton import Singleton
+from config.configuration_vars import ConfigVars
+
+logger = logging.getLogger(__name__)
+
+
+class ICPFilter(metaclass=Singleton):
+    """
+    Decides which companies fit the ICP.
+
+    Rules come from the optional [ICP] section of the secrets file:
+    ``EXCLUDED_INDUSTRIES`` (a list literal), ``MIN_STAFF``/``MAX_STAFF``
+    (bounds on the LinkedIn staff range) and ``MIN_FOUNDED_YEAR``/
+    ``MAX_FOUNDED_YEAR``. Unset bounds are not checked. By default staffing
+    and HR companies are excluded and the staff range must top out at 200.
+    """
+
+    STAFF_RANGE_PATTERN = re.compile(r"^\s*(\d+)\s*-\s*(\d+)\s*$")
+    OPEN_STAFF_RANGE_PATTERN = re.compile(r"^\s*(\d+)\s*\+\s*$")
+
+    def __init__(self) -> None:
+        rules = ConfigVars().icp
+        self.excluded_industries = list(rules["excluded_industries"])
+        self.min_staff = rules["min_staff"]
+        self.max_staff = rules["max_staff"]
+        self.min_founded_year = rules["min_founded_year"]
+        self.max_founded_year = rules["max_founded_year"]
+
+    @classmethod
+    def staff_bounds(cls, staff_ranges: pd.Series) -> pd.DataFrame:
+        """
+        Parse LinkedIn staff ranges ("11-50", "10001+") over a whole column.
+
+        Open ranges "N+" parse as [0, N], as parse_staff_range always did;
+        anything else unparseable gives NaN bounds.
+
+        Returns:
+            pd.DataFrame: ``lower_limit`` and ``upper_limit`` columns.
+        """
+        text = staff_ranges.astype(object).where(staff_ranges.map(type) == str)
+        closed = text.str.extract(cls.STAFF_RANGE_PATTERN).astype(float)
+        open_upper = text.str.extract(cls.OPEN_STAFF_RANGE_PATTERN, expand=False)
+        open_upper = open_upper.astype(float)
+
+        lower = closed[0].where(open_upper.isna(), 0.0)
+        upper = closed[1].fillna(open_upper)
+        return pd.DataFrame(
+            {"lower_limit": lower, "upper_limit": upper}, index=staff_ranges.index
+        )
+
+    def add_staff_bounds(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Add ``lower_limit``/``upper_limit`` parsed from ``staffCountRange``."""
+        if "staffCountRange" in df:
+            df[["lower_limit", "upper_limit"]] = self.staff_bounds(
+                df["staffCountRange"]
+            )
+        return df
+
+    def _industry_mask(self, df: pd.DataFrame) -> pd.Series:
+        if "industries" not in df or not self.excluded_industries:
+            return pd.Series(True, index=df.index)
+        industries = df["industries"]
+        listed = industries[industries.map(type) == list].explode()
+        excluded = listed.isin(self.excluded_industries).groupby(level=0).any()
+        return ~excluded.reindex(df.index, fill_value=False)
+
+    @staticmethod
+    def _bounds_mask(df, column, lower=None, upper=None) -> pd.Series:
+        mask = pd.Series(True, index=df.index)
+        if lower is None and upper is None:
+            return mask
+        values = (
+            pd.to_numeric(df[column], errors="coerce")
+            if column in df
+            else pd.Series(float("nan"), index=df.index)
+        )
+        # Missing values fail any bound that is set
+        if lower is not None:
+            mask &= values >= lower
+        if upper is not None:
+            mask &= values <= upper
+        return mask
+
+    def mask(self, df: pd.DataFrame) -> pd.Series:
+        """
+        Evaluate the rules over a cleaned company frame.
+
+        Args:
+            df (pd.DataFrame): Companies with industries, lower/upper_limit
+                and founded_year columns.
+
+        Returns:
+            pd.Series: True for companies that fit the ICP.
+        """
+        return (
+            self._industry_mask(df)
+            & self._bounds_mask(df, "lower_limit", lower=self.min_staff)
+            & self._bounds_mask(df, "upper_limit", upper=self.max_staff)
+            & self._bounds_mask(
+                df,
+                "founded_year",
+                lower=self.min_founded_year,
+                upper=self.max_founded_year,
+            )
+        )
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Keep the companies that fit the ICP."""
+        if df.empty:
+            return df
+        return df[self.mask(df)].reset_index(drop=True)
+
+    def mongo_query(self) -> Dict[str, Any]:
+        """
+        Express the rules as a RawCompany query.
+
+        Staff bounds are stored on RawCompany documents since this filter was
+        introduced; documents written before that are let through and
+        filtered in pandas instead.
+
+        Returns:
+            Dict[str, Any]: Query selecting cached companies that may fit the ICP.
+        """
+        clauses = []
+        if self.excluded_industries:
+            clauses.append({"industries": {"$nin": self.excluded_industries}})
+
+        for field, lower, upper in (
+            ("lower_limit", self.min_staff, None),
+            ("upper_limit", None, self.max_staff),
+        ):
+            bounds = {}
+            if lower is not None:
+                bounds["$gte"] = lower
+            if upper is not None:
+                bounds["$lte"] = upper
+            if bounds:
+                clauses.append(
+                    {"$or": [{field: bounds}, {field: {"$exists": False}}]}
+                )
+
+        year_bounds = {}
+        if self.min_founded_year is not None:
+            year_bounds["$gte"] = self.min_founded_year
+        if self.max_founded_year is not None:
+            year_bounds["$lte"] = self.max_founded_year
+        if year_bounds:
+            clauses.append({"founded.year": year_bounds})
+
+        return {"$and": clauses} if clauses else {}
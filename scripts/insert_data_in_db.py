@@ -25,6 +25,17 @@ class InsertData(metaclass=Singleton):
             "RawCompany": ["companyId"],
             "FinalData": ["profileURL"],
             "Query": ["query_id"],
+            "ApiUsage": ["query_id", "provider", "endpoint"],
+        }
+
+    @staticmethod
+    def secondary_indexes():
+        """Non-unique indexes backing lookups by fields other than the unique keys."""
+        return {
+            "RawCompany": [["linkedinUrl"]],
+            "CompanyIdentity": [["aliases"]],
+            "RawPeople": [["profileURL"]],
+            "RawPosts": [["username", "postedDateTimestamp"]],
         }
 
     @staticmethod
@@ -48,6 +59,17 @@ class InsertData(metaclass=Singleton):
             except Exception as e:
                 print(f"Failed to create index on {collection_name}: {e}")
 
+        for collection_name, indexes in self.secondary_indexes().items():
+            collection = client.get_collection(collection_name)
+            for keys in indexes:
+                try:
+                    collection.create_index(
+                        [(key, ASCENDING) for key in keys], background=True
+                    )
+                    print(f"Ensured index on {collection_name} for keys: {keys}")
+                except Exception as e:
+                    print(f"Failed to create index on {collection_name}: {e}")
+
     def insert_or_upsert_to_mongo(self, client, collection_name, data):
         """Insert or upsert records into a MongoDB collection based on unique key constraints."""
         if not data:
@@ -7,12 +7,7 @@ import os
 import logging
 import warnings
 import pandas as pd
-from retry import retry
 import streamlit as st
-import requests
-import time
-from time import sleep
-from random import uniform
 
 warnings.filterwarnings("ignore")
 
@@ -21,6 +16,7 @@ from config.singleton import Singleton
 from scripts.insert_data_in_db import InsertData
 from scripts.helper_functions import HelperFunctions
 from scripts.rapid_api import RapidAPI
+from scripts.company_identity import CompanyIdentity
 
 
 logger = logging.getLogger(__name__)
@@ -154,7 +150,6 @@ class JobOpenings(metaclass=Singleton):
         inserter.ensure_indexes(client)
 
         # ---------------------------- Job Data ---------------------------- #
-        @retry(tries=5, delay=2, backoff=2)
         def fetch_all_jobs(keywords, **kwargs):
             if isinstance(keywords, str):
                 keyword_list = [k.strip() for k in keywords.split(",") if k.strip()]
@@ -167,7 +162,10 @@ class JobOpenings(metaclass=Singleton):
             for kw in keyword_list:
                 try:
                     response = RapidAPI().search_jobs(keywords=kw, **kwargs)
-                    jobs = response.get("data", [])
+                    if response is None:
+                        log_progress(f"Error fetching jobs for keyword '{kw}'")
+                        continue
+                    jobs = response.get("data") or []
                     log_progress(f"Fetched {len(jobs)} jobs for keyword '{kw}'")
                     all_jobs.extend(jobs)
                 except Exception as e:
@@ -187,8 +185,7 @@ class JobOpenings(metaclass=Singleton):
         log_progress("🔍 Fetching jobs from Rapid API...")
         jobs_raw = fetch_all_jobs(keywords=keywords, **job_args)
         helper = HelperFunctions()
-        jobs_df = pd.DataFrame([helper.flatten_dict(job) for job in jobs_raw])
-        jobs_df.rename(columns={"id": "job_id"}, inplace=True)
+        jobs_df = helper.normalize_jobs(jobs_raw)
 
         if jobs_df is not None and not jobs_df.empty:
             jobs_df = jobs_df.head(10)
@@ -211,8 +208,26 @@ class JobOpenings(metaclass=Singleton):
         # ✅ Example using get_database() method
         db = client.get_collection("FinalData")  # or client.db if it’s a property
 
-        existing_docs = db.find({"company": {"$in": company_names}}, {"company": 1})
-        existing_company_names = {doc["company"] for doc in existing_docs}
+        # Companies stored in FinalData under their canonical name count too
+        identity = CompanyIdentity(client)
+        identities = identity.resolve_job_companies(jobs_df)
+        lookup_names = set(company_names) | {
+            doc["name"] for doc in identities.values() if doc.get("name")
+        }
+
+        existing_docs = db.find({"company": {"$in": list(lookup_names)}}, {"company": 1})
+        existing_names = {doc["company"] for doc in existing_docs}
+        existing_ids = {
+            doc["companyId"]
+            for name, doc in identities.items()
+            if name in existing_names or doc.get("name") in existing_names
+        }
+        existing_company_names = {
+            name
+            for name in company_names
+            if name in existing_names
+            or identities.get(name, {}).get("companyId") in existing_ids
+        }
 
         # ✅ Step 3: Filter out rows with existing companies
         if existing_company_names:
@@ -311,43 +326,32 @@ class JobOpenings(metaclass=Singleton):
             st.warning("⚠️ No hiring manager data found. Try different filters.")
             st.stop()
 
-        # @retry(tries=2, delay=1)
-        # def fetch_profile(link):
-        #     try:
-        #         profile = RapidAPI().get_linkedin_profile_data_by_url(link)
-        #         if profile:
-        #             profile["profileURL"] = link
-        #         return profile
-        #     except Exception as e:
-        #         log_progress(f"Error fetching profile {link}: {e}")
-        #         return {}
-
-        @retry(tries=5, delay=2, backoff=2)  # Exponential backoff: 2s, 4s, 8s, ...
+        # Transient failures (429, 5xx, timeouts) are retried inside RapidAPI
         def fetch_profile(link):
             try:
                 response = RapidAPI().get_linkedin_profile_data_by_url(link)
-                if isinstance(response, requests.Response):
-                    if response.status_code == 429:
-                        raise requests.exceptions.HTTPError("429 Too Many Requests")
                 if response:
                     response["profileURL"] = link
-                return response
-            except requests.exceptions.HTTPError as e:
-                if "429" in str(e):
-                    log_progress(f"⚠️ Rate limit hit for {link}. Retrying...")
-                    raise  # Retry decorator will handle backoff and retry
-                else:
-                    log_progress(f"❌ HTTPError for {link}: {e}")
+                return response or {}
             except Exception as e:
                 log_progress(f"❌ General error fetching {link}: {e}")
             return {}
 
         log_progress("📄 Fetching LinkedIn profiles...")
+        links = list(people_df["profileURL"].dropna().unique())
+
+        # Stored profiles are prefetched in one indexed query; only misses hit RapidAPI
+        cached_profiles = {
+            doc["profileURL"]: doc
+            for doc in client.get_collection("RawPeople").find(
+                {"profileURL": {"$in": links}},
+                {"_id": 0, "message_date": 0, "Company": 0, "company_name": 0},
+            )
+        }
         profiles = []
-        for link in people_df["profileURL"].dropna().unique():
-            profile_data = fetch_profile(link)
+        for link in links:
+            profile_data = cached_profiles.get(link) or fetch_profile(link)
             profiles.append(profile_data)
-            time.sleep(5)  # Add delay between each API call
 
         profiles_df = pd.DataFrame(profiles)
         profiles_df = pd.merge(
@@ -360,74 +364,7 @@ class JobOpenings(metaclass=Singleton):
             client, "RawPeople", inserter.prepare_data(profiles_df)
         )
 
-        selected = [
-            "id",
-            "profileURL",
-            "Company",
-            "username",
-            "firstName",
-            "lastName",
-            "headline",
-            "geo",
-            "educations",
-            "position",
-            "fullPositions",
-            "skills",
-            "summary",
-            "volunteering",
-        ]
-        final_people = profiles_df[
-            [col for col in selected if col in profiles_df.columns]
-        ].copy()
-        final_people["processed_fullPositions"] = (
-            final_people["fullPositions"].dropna().apply(helper.process_full_positions)
-        )
-        final_people["latest_experience"] = final_people.apply(
-            lambda row: helper.find_relevant_experience(
-                row["processed_fullPositions"], None
-            ),
-            axis=1,
-        )
-        final_people = pd.concat(
-            [
-                final_people.drop(
-                    columns=["latest_experience", "geo"], errors="ignore"
-                ),
-                pd.json_normalize(final_people["latest_experience"]),
-                pd.json_normalize(final_people["geo"]),
-            ],
-            axis=1,
-        )
-        final_people["clean_skills"] = final_people["skills"].apply(
-            helper.process_skills
-        )
-        final_people.rename(
-            columns={"Company": "company", "full": "full_address"}, inplace=True
-        )
-        final_people.drop(
-            columns=[
-                col
-                for col in [
-                    "start.year",
-                    "start.month",
-                    "start.day",
-                    "end.year",
-                    "end.month",
-                    "end.day",
-                    "educations",
-                    "position",
-                    "fullPositions",
-                    "skills",
-                    "volunteering",
-                    "id",
-                    "country",
-                    "city",
-                    "countryCode",
-                ]
-                if col in final_people
-            ],
-            inplace=True,
-        )
+        final_people = helper.flatten_profiles(profiles_df, company_column="Company")
         final_people = final_people[
             final_people["company"] == final_people["companyName"]
         ].reset_index(drop=True)
@@ -435,7 +372,6 @@ class JobOpenings(metaclass=Singleton):
             drop=True
         )
 
-        @retry(tries=5, delay=2, backoff=2)
         def fetch_posts(username):
             try:
                 posts = (
@@ -499,7 +435,6 @@ class JobOpenings(metaclass=Singleton):
                 ),
             ).rename(columns={"Username": "username"})
 
-        @retry(tries=5, delay=2, backoff=2)
         def fetch_company(cid):
             try:
                 data = RapidAPI().get_linkedin_company_details_by_id(cid)
@@ -509,19 +444,45 @@ class JobOpenings(metaclass=Singleton):
                 return {}
 
         log_progress("🏢 Fetching company info...")
+        company_ids = final_people["companyId"].dropna().unique()
+
+        # Companies with a known identity are already in RawCompany
+        known_ids = [
+            doc["companyId"] for doc in identity.resolve("id", company_ids).values()
+        ]
+        known_companies = (
+            list(
+                client.get_collection("RawCompany").find(
+                    {"companyId": {"$in": known_ids}}, {"_id": 0, "message_date": 0}
+                )
+            )
+            if known_ids
+            else []
+        )
+        known_aliases = {
+            CompanyIdentity.alias("id", company["companyId"])
+            for company in known_companies
+        }
+
         company_data = []
-        for cid in final_people["companyId"].dropna().unique():
+        for cid in company_ids:
+            if CompanyIdentity.alias("id", cid) in known_aliases:
+                continue
             try:
                 company = fetch_company(int(cid))
                 company_data.append(company)
             except Exception:
                 continue
+        identity.record([company for company in company_data if company])
 
         company_df = pd.DataFrame(company_data).dropna(how="all").reset_index(drop=True)
         company_df.rename(columns={"id": "companyId"}, inplace=True)
         inserter.insert_or_upsert_to_mongo(
             client, "RawCompany", inserter.prepare_data(company_df)
         )
+        company_df = pd.concat(
+            [pd.DataFrame(known_companies), company_df], ignore_index=True
+        )
         company_df.drop(
             columns=[
                 "Images",
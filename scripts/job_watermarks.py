@@ -0,0 +1,177 @@
+"""
+This script contains the job search watermarks that let reruns of the same
+search skip jobs harvested by earlier runs.
+"""
+
+import sys
+import os
+import json
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from scripts.response_cache import ResponseCache
+
+logger = logging.getLogger(__name__)
+
+
+class JobWatermarks:
+    """
+    Newest ``postedTimestamp`` seen per search, stored in ``JobWatermarks``.
+
+    A search is one keyword plus the normalized filters (location, industry,
+    function, ...), since that is the unit RapidAPI sorts and paginates.
+    Watermarks only apply to "mostRecent" searches, where everything past the
+    first known job has been harvested before. A watermark therefore only
+    advances once a run has harvested every job above the previous one, i.e.
+    the search reached known jobs or ran out of pages; a search abandoned
+    early keeps its watermark, so the jobs it skipped are seen again.
+    """
+
+    COLLECTION = "JobWatermarks"
+
+    def __init__(self, mongo_client) -> None:
+        self.collection = mongo_client.get_collection(self.COLLECTION)
+        self._loaded: Dict[str, Optional[float]] = {}
+        self._newest: Dict[str, Dict[str, Any]] = {}
+        self._complete = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def applies(filters: Dict[str, Any]) -> bool:
+        """Watermarks are only meaningful when results are newest first."""
+        return filters.get("sort", "mostRecent") == "mostRecent"
+
+    @staticmethod
+    def search_filters(keyword: str, filters: Dict[str, Any]) -> Dict[str, str]:
+        """Normalize a search so equivalent filter sets share a watermark."""
+        search = {
+            name: value
+            for name, value in filters.items()
+            if name not in ("start", "sort")
+        }
+        search["keywords"] = keyword.strip().lower()
+        return ResponseCache.normalize_params(search)
+
+    @classmethod
+    def key(cls, keyword: str, filters: Dict[str, Any]) -> str:
+        raw = json.dumps(cls.search_filters(keyword, filters), sort_keys=True)
+        return hashlib.sha256(raw.encode("UTF-8")).hexdigest()
+
+    @staticmethod
+    def posted_at(job: Dict[str, Any]) -> Optional[float]:
+        """Return a job's postedTimestamp as a number, or None if missing."""
+        try:
+            return float(job.get("postedTimestamp"))
+        except (TypeError, ValueError):
+            return None
+
+    def get(self, keyword: str, filters: Dict[str, Any]) -> Optional[float]:
+        """
+        Return the watermark of a search, loading it once per run.
+
+        Returns:
+            Optional[float]: Newest postedTimestamp harvested before, or None.
+        """
+        if not self.applies(filters):
+            return None
+        key = self.key(keyword, filters)
+        with self._lock:
+            if key in self._loaded:
+                return self._loaded[key]
+        try:
+            doc = self.collection.find_one({"_id": key}, {"postedTimestamp": 1})
+        except Exception as e:
+            logger.warning(f"Could not read job watermark for '{keyword}': {e}")
+            doc = None
+        watermark = doc.get("postedTimestamp") if doc else None
+        with self._lock:
+            self._loaded[key] = watermark
+        return watermark
+
+    def split(self, keyword: str, filters: Dict[str, Any], jobs):
+        """
+        Keep the jobs posted after the search's watermark.
+
+        Args:
+            keyword (str): Search keyword.
+            filters (Dict[str, Any]): Search filters.
+            jobs (list): Raw jobs of one page.
+
+        Returns:
+            tuple: (jobs newer than the watermark, whether a known job was reached).
+        """
+        watermark = self.get(keyword, filters)
+        if watermark is None:
+            return jobs, False
+
+        fresh, reached_known = [], False
+        for job in jobs:
+            posted = self.posted_at(job)
+            if posted is not None and posted <= watermark:
+                reached_known = True
+                continue
+            fresh.append(job)
+        return fresh, reached_known
+
+    def observe(self, keyword: str, filters: Dict[str, Any], jobs) -> None:
+        """
+        Remember the newest job handed to the caller until ``save`` is called.
+
+        Only jobs the caller actually received should be observed; they are
+        saved only if the search is then marked ``complete``.
+        """
+        if not self.applies(filters):
+            return
+        newest = max(filter(None, map(self.posted_at, jobs)), default=None)
+        if newest is None:
+            return
+        key = self.key(keyword, filters)
+        with self._lock:
+            current = self._newest.get(key)
+            if current is None or newest > current["postedTimestamp"]:
+                self._newest[key] = {
+                    "postedTimestamp": newest,
+                    "filters": self.search_filters(keyword, filters),
+                }
+
+    def complete(self, keyword: str, filters: Dict[str, Any]) -> None:
+        """
+        Mark a search as harvested down to its watermark (or its last page).
+
+        Call this when the search reached known jobs or ran out of pages, after
+        its jobs were handed to the caller.
+        """
+        if not self.applies(filters):
+            return
+        with self._lock:
+            self._complete.add(self.key(keyword, filters))
+
+    def save(self) -> None:
+        """Advance the watermarks of the searches completed in this run."""
+        with self._lock:
+            newest, self._newest = self._newest, {}
+            complete, self._complete = self._complete, set()
+        for key, mark in newest.items():
+            if key not in complete:
+                # Jobs between this run's last page and the old watermark were
+                # never harvested; advancing past them would skip them for good
+                logger.info(f"Job watermark kept for {mark['filters']}: stopped early")
+                continue
+            try:
+                self.collection.update_one(
+                    {"_id": key},
+                    {
+                        "$max": {"postedTimestamp": mark["postedTimestamp"]},
+                        "$set": {
+                            "filters": mark["filters"],
+                            "message_date": datetime.utcnow().isoformat(),
+                        },
+                    },
+                    upsert=True,
+                )
+            except Exception as e:
+                logger.warning(f"Could not save job watermark {mark['filters']}: {e}")
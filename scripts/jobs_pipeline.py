@@ -4,6 +4,7 @@ This is the main script to pull job data from RapidAPI and store it in MongoDB.
 
 import sys
 import os
+import re
 import logging
 import warnings
 import pandas as pd
@@ -20,19 +21,32 @@ from config.singleton import Singleton
 from scripts.insert_data_in_db import InsertData
 from scripts.helper_functions import HelperFunctions
 from scripts.rapid_api import RapidAPI
+from scripts.async_rapid_api import AsyncRapidAPI
 from scripts.mongo_client import MongoDBClient
+from scripts.job_watermarks import JobWatermarks
 
 
 logger = logging.getLogger(__name__)
 
 
 class JobFetcherPipeline:
+    # Data the stage reads and writes, used by the orchestrator to prune stages
+    CONSUMES = ()
+    PRODUCES = ("jobs",)
+
+    # Ids sent per $in query when checking which jobs are already stored
+    EXISTING_IDS_BATCH_SIZE = 1000
+
+    COMPANY_USERNAME_PATTERN = re.compile(r"/company/([^/]+)/")
+    COMPANY_LIFE_SUFFIX = re.compile(r"/life$")
+
     def __init__(self, mongo_client: MongoDBClient, status=None):
         self.client = mongo_client
         self.db_raw = self.client.get_collection("RawJobs")
         self.db_clean = self.client.get_collection("Jobs")
         self.helper = HelperFunctions()
         self.inserter = InsertData()
+        self.watermarks = JobWatermarks(self.client)
         self.status = status
 
     def log_progress(self, message):
@@ -41,43 +55,200 @@ class JobFetcherPipeline:
         else:
             print(message)
 
-    def fetch_jobs(self, keywords, **filters):
+    @staticmethod
+    def _split_keywords(keywords):
         if isinstance(keywords, str):
-            keyword_list = [k.strip() for k in keywords.split(",") if k.strip()]
-        elif isinstance(keywords, list):
-            keyword_list = [str(k).strip() for k in keywords if str(k).strip()]
-        else:
-            raise ValueError("keywords must be a string or list of strings")
+            return [k.strip() for k in keywords.split(",") if k.strip()]
+        if isinstance(keywords, list):
+            return [str(k).strip() for k in keywords if str(k).strip()]
+        raise ValueError("keywords must be a string or list of strings")
+
+    @staticmethod
+    def _unseen_jobs(jobs, seen_ids):
+        """Keep the jobs whose id was not seen yet, recording their ids."""
+        unseen = []
+        for job in jobs:
+            job_id = job.get("id")
+            if job_id in seen_ids:
+                continue
+            if job_id is not None:
+                seen_ids.add(job_id)
+            unseen.append(job)
+        return unseen
+
+    async def _search_keywords(self, keyword_list, seen_ids, **filters):
+        """
+        Search all keywords concurrently and merge the results as they arrive.
+
+        Returns:
+            list: (keyword, raw page or None if it failed, new jobs, reached a
+            known job) in arrival order.
+        """
+        results = []
+        async for kw, response in AsyncRapidAPI().iter_jobs(keyword_list, **filters):
+            if response is None:
+                self.log_progress(f"⚠️ Error fetching jobs for '{kw}'")
+                results.append((kw, None, [], False))
+                continue
+            jobs = response.get("data") or []
+            fresh_jobs, reached_known = self.watermarks.split(kw, filters, jobs)
+            new_jobs = self._unseen_jobs(fresh_jobs, seen_ids)
+            self.log_progress(
+                f"✅ {len(jobs)} jobs fetched for keyword '{kw}' ({len(new_jobs)} new)"
+            )
+            results.append((kw, jobs, new_jobs, reached_known))
+        return results
+
+    def save_watermarks(self):
+        """Record the newest jobs handed out so reruns can skip them."""
+        self.watermarks.save()
+
+    def _search_done(self, kw, filters, jobs, reached_known):
+        """
+        Mark a keyword's harvest complete when it reached known jobs or its
+        page was a successful short one; ``jobs`` is None for a failed page.
+        """
+        last_page = jobs is not None and len(jobs) < RapidAPI.JOBS_PAGE_SIZE
+        if reached_known or last_page:
+            self.watermarks.complete(kw, filters)
+
+    def fetch_jobs(self, keywords, concurrent=True, **filters):
+        keyword_list = self._split_keywords(keywords)
+        seen_ids = set()
+
+        if concurrent and len(keyword_list) > 1:
+            results = AsyncRapidAPI.run(
+                self._search_keywords(keyword_list, seen_ids, **filters)
+            )
+            for kw, jobs, new_jobs, reached_known in results:
+                self.watermarks.observe(kw, filters, new_jobs)
+                self._search_done(kw, filters, jobs, reached_known)
+            return [job for _, _, new_jobs, _ in results for job in new_jobs]
 
         all_jobs = []
         for kw in keyword_list:
             try:
                 response = RapidAPI().search_jobs(keywords=kw, **filters)
-                jobs = response.get("data", [])
+                if response is None:
+                    self.log_progress(f"⚠️ Error fetching jobs for '{kw}'")
+                    continue
+                jobs = response.get("data") or []
                 self.log_progress(f"✅ {len(jobs)} jobs fetched for keyword '{kw}'")
-                all_jobs.extend(jobs)
+                fresh_jobs, reached_known = self.watermarks.split(kw, filters, jobs)
+                new_jobs = self._unseen_jobs(fresh_jobs, seen_ids)
+                self.watermarks.observe(kw, filters, new_jobs)
+                self._search_done(kw, filters, jobs, reached_known)
+                all_jobs.extend(new_jobs)
             except Exception as e:
                 self.log_progress(f"⚠️ Error fetching jobs for '{kw}': {e}")
         return all_jobs
 
+    def iter_job_pages(self, keywords, max_pages=None, concurrent=True, **filters):
+        """
+        Lazily yield pages of raw jobs, taking one page per keyword in turn.
+
+        Deeper pages are only requested once every keyword has contributed its
+        earlier pages, so callers that stop early pay for the freshest results.
+        In concurrent mode each round of pages is fetched for all keywords at
+        once, through the shared rate limiter, and jobs already yielded under
+        another keyword are dropped.
+
+        Jobs at or below a keyword's watermark (harvested by an earlier run of
+        the same search) are skipped, and the keyword stops paginating once it
+        reaches them. Call save_watermarks after the yielded jobs are stored;
+        only keywords that reached known jobs or their last page advance their
+        watermark. A failed page or the ``max_pages`` cap leaves it as it was.
+        """
+        keyword_list = self._split_keywords(keywords)
+        if concurrent and len(keyword_list) > 1:
+            yield from self._iter_job_pages_concurrently(
+                keyword_list, max_pages, **filters
+            )
+            return
+
+        searches = [
+            (kw, RapidAPI().iter_job_pages(max_pages=max_pages, keywords=kw, **filters))
+            for kw in keyword_list
+        ]
+        pages_read = dict.fromkeys(keyword_list, 0)
+        while searches:
+            for search in list(searches):
+                kw, pages = search
+                try:
+                    jobs = next(pages)
+                except StopIteration:
+                    # Below the cap, the search only stops on an empty page
+                    if max_pages is None or pages_read[kw] < max_pages:
+                        self.watermarks.complete(kw, filters)
+                    searches.remove(search)
+                    continue
+                except Exception as e:
+                    self.log_progress(f"⚠️ Error fetching jobs for '{kw}': {e}")
+                    searches.remove(search)
+                    continue
+                pages_read[kw] += 1
+                self.log_progress(f"✅ {len(jobs)} jobs fetched for keyword '{kw}'")
+                fresh_jobs, reached_known = self.watermarks.split(kw, filters, jobs)
+                self._search_done(kw, filters, jobs, reached_known)
+                if reached_known:
+                    self.log_progress(f"⏹️ Reached jobs already harvested for '{kw}'")
+                    searches.remove(search)
+                if fresh_jobs:
+                    self.watermarks.observe(kw, filters, fresh_jobs)
+                    yield fresh_jobs
+
+    def _iter_job_pages_concurrently(self, keyword_list, max_pages=None, **filters):
+        page_size = RapidAPI.JOBS_PAGE_SIZE
+        active, seen_ids, page = list(keyword_list), set(), 0
+        while active and (max_pages is None or page < max_pages):
+            results = AsyncRapidAPI.run(
+                self._search_keywords(
+                    active, seen_ids, start=page * page_size, **filters
+                )
+            )
+            for kw, jobs, new_jobs, reached_known in results:
+                # Short or failed pages mean the keyword has no deeper results
+                if reached_known:
+                    self.log_progress(f"⏹️ Reached jobs already harvested for '{kw}'")
+                if jobs is None or len(jobs) < page_size or reached_known:
+                    active.remove(kw)
+                self._search_done(kw, filters, jobs, reached_known)
+                if new_jobs:
+                    self.watermarks.observe(kw, filters, new_jobs)
+                    yield new_jobs
+            page += 1
+
     def clean_and_filter_jobs(self, jobs_raw):
-        jobs_df = pd.DataFrame([self.helper.flatten_dict(job) for job in jobs_raw])
-        if jobs_df.empty:
+        jobs_df = self.helper.normalize_jobs(jobs_raw)
+        if jobs_df.empty or "company_url" not in jobs_df:
             return pd.DataFrame()
 
-        jobs_df.rename(columns={"id": "job_id"}, inplace=True)
         clean_jobs = jobs_df.dropna(subset=["company_url"]).reset_index(drop=True)
-        clean_jobs["company_username"] = clean_jobs["company_url"].str.extract(
-            r"/company/([^/]+)/"
+        company_urls = clean_jobs["company_url"].astype(str)
+        clean_jobs["company_username"] = company_urls.str.extract(
+            self.COMPANY_USERNAME_PATTERN, expand=False
         )
-        clean_jobs["linkedinUrl"] = clean_jobs["company_url"].str.replace(
-            r"/life$", "", regex=True
+        clean_jobs["linkedinUrl"] = company_urls.str.replace(
+            self.COMPANY_LIFE_SUFFIX, "", regex=True
         )
         return clean_jobs
 
-    def get_existing_job_ids(self):
-        cursor = self.db_raw.find({}, {"_id": 0, "job_id": 1})
-        return {doc["job_id"] for doc in cursor if "job_id" in doc and doc["job_id"]}
+    def get_existing_job_ids(self, candidate_ids):
+        """
+        Return the candidate job ids already stored in RawJobs.
+
+        Only the candidates are looked up, in batches of $in queries answered
+        by the unique job_id index, so the cost does not grow with RawJobs.
+        """
+        candidate_ids = list(candidate_ids)
+        existing = set()
+        for start in range(0, len(candidate_ids), self.EXISTING_IDS_BATCH_SIZE):
+            batch = candidate_ids[start : start + self.EXISTING_IDS_BATCH_SIZE]
+            cursor = self.db_raw.find(
+                {"job_id": {"$in": batch}}, {"_id": 0, "job_id": 1}
+            )
+            existing.update(doc["job_id"] for doc in cursor if doc.get("job_id"))
+        return existing
 
     def _insert_jobs(self, collection_name, df):
         if df.empty:
@@ -90,7 +261,11 @@ class JobFetcherPipeline:
     def run(self, keywords, **filters):
         self.log_progress("🔍 Fetching jobs from RapidAPI...")
         jobs_raw = self.fetch_jobs(keywords, **filters)
+        jobs_df = self.process_jobs(jobs_raw)
+        self.save_watermarks()
+        return jobs_df
 
+    def process_jobs(self, jobs_raw):
         if not jobs_raw:
             self.log_progress("❌ No jobs fetched.")
             return pd.DataFrame()
@@ -101,7 +276,7 @@ class JobFetcherPipeline:
             return pd.DataFrame()
 
         new_job_ids = set(clean_jobs["job_id"].dropna().unique())
-        existing_job_ids = self.get_existing_job_ids()
+        existing_job_ids = self.get_existing_job_ids(new_job_ids)
         actual_new_job_ids = new_job_ids - existing_job_ids
 
         main_jobs_df = clean_jobs[
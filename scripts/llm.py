@@ -9,6 +9,10 @@ from ast import literal_eval
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from config.configuration_vars import ConfigVars
+from scripts.cassette import cassette
+from scripts.circuit_breaker import circuit_breaker
+from scripts.retry_policy import with_retries
+from scripts.metering import metered
 
 
 class ClaudeAIResponse:
@@ -18,6 +22,10 @@ class ClaudeAIResponse:
     """
 
     @staticmethod
+    @with_retries("bedrock")
+    @circuit_breaker("bedrock")
+    @metered("bedrock")
+    @cassette("bedrock")
     def get_claude_sonnet35_response(system_prompt, user_prompt):
         """
         Sends a prompt to the Claude 3.5 Sonnet model via Anthropic Bedrock
@@ -34,6 +42,8 @@ class ClaudeAIResponse:
             aws_secret_key=literal_eval(ConfigVars().aws_secret_key),
             aws_access_key=literal_eval(ConfigVars().aws_access_key),
             aws_region=literal_eval(ConfigVars().aws_region),
+            # Retries are left to the shared retry engine and its run budget
+            max_retries=0,
         )
 
         messages = []
@@ -21,6 +21,9 @@ from scripts.email_sequence import GetEmailSequence
 from scripts.snov_data_dump import Snov
 from scripts.insert_data_in_db import InsertData
 from scripts.orchetrator import Orchestrator
+from scripts.retry_policy import RetryEngine
+from scripts.metering import UsageMeter
+from scripts.streaming import StreamingPipeline
 
 logger = logging.getLogger(__name__)
 
@@ -30,9 +33,154 @@ class LeadGen(metaclass=Singleton):
     This class contains the main code for the complete workflow.
     """
 
+    # Worker threads of the email finding and email writing stages
+    EMAIL_WORKERS = 2
+    LLM_WORKERS = 2
+
     def __init__(self) -> None:
         pass
 
+    @staticmethod
+    def find_emails(batch, status):
+        """
+        Find the emails of a batch of prospects and merge them in.
+
+        Runs on a streaming worker thread, so progress goes to ``status``.
+
+        Returns:
+            dict: The batch with "final_people", or None if it has no prospects.
+        """
+        people_df = batch["people"]
+        if people_df.empty:
+            return None
+
+        # A failing batch is dropped without stopping the batches after it
+        try:
+            status.write(f"📥 Collecting emails for {len(people_df)} prospects...")
+            email_from_url_data = (
+                SnovEmailFinder().collect_emails_from_linkedin_urls(people_df)
+            )
+
+            status.write("📩 Enriching missing emails...")
+            emails_data = SnovEmailFinder().enrich_missing_emails(email_from_url_data)
+        except Exception as e:
+            logger.exception("Email lookup failed for a batch of prospects")
+            status.write(f"⚠️ Email lookup failed for some prospects: {e}")
+            return None
+
+        status.write("🔗 Merging email data with people...")
+        batch["final_people"] = (
+            pd.merge(
+                people_df,
+                emails_data.reindex(
+                    columns=[
+                        "profileURL",
+                        "name",
+                        "emails",
+                        "currentJob_position",
+                        "currentJob_site",
+                        "domain",
+                    ]
+                ),
+                on="profileURL",
+                how="left",
+            )
+            .drop_duplicates(subset=["profileURL"])
+            .reset_index(drop=True)
+        )
+        return batch
+
+    @staticmethod
+    def write_email_sequences(batch, status):
+        """
+        Generate the email sequences of a batch of prospects and build its leads.
+
+        Runs on a streaming worker thread, so progress goes to ``status``.
+
+        Returns:
+            dict: The batch with "final_data", or None if no lead came out of it.
+        """
+        final_people = batch["final_people"]
+        jobs_df = batch["jobs"]
+
+        # status.write("🧠 Generating questionnaire summaries...")
+        # questionnaire_response = HelperFunctions().get_questionnaire_data(
+        #     jobs_df, batch["companies"], final_people, batch["posts"]
+        # )
+
+        status.write("✉️ Generating email sequences...")
+        try:
+            all_emails = GetEmailSequence().generate_email_sequence(
+                final_people, jobs_df, batch["posts"]
+            )
+        except Exception as e:
+            logger.exception("Email generation failed for a batch of prospects")
+            status.write(f"⚠️ Email generation failed for some prospects: {e}")
+            return None
+        all_emails = all_emails.dropna().reset_index(drop=True)
+        if all_emails.empty:
+            return None
+
+        status.write("🧽 Formatting email output...")
+        final_emails = GetEmailSequence().format_emails(all_emails)
+
+        status.write("🧹 Cleaning bullet points in emails...")
+        email_body_cols = [f"Email Body {i}" for i in range(1, 6)]
+        for col in email_body_cols:
+            if col in final_emails.columns:
+                final_emails[col] = final_emails[col].apply(
+                    GetEmailSequence().remove_line_breaks
+                )
+
+        status.write("🧬 Merging all data...")
+        # final_people = pd.merge(
+        #     final_people,
+        #     questionnaire_response,
+        #     left_on="company",
+        #     right_on="Company Name",
+        #     how="left",
+        # ).drop(columns="Company Name")
+
+        final_data = pd.merge(
+            final_people,
+            final_emails,
+            left_on="profileURL",
+            right_on="LinkedIn URL",
+            how="left",
+        ).drop(columns=["First Name", "Last Name", "LinkedIn URL"])
+
+        # Adding Job Title & Job URL in the Data
+        jobs_df = jobs_df.rename(
+            columns={"title": "job_opening_title", "company_name": "company"}
+        )
+        final_data = pd.merge(
+            final_data,
+            jobs_df[["job_opening_title", "job_url", "company"]],
+            on=["company"],
+            how="left",
+        )
+
+        # Drop any duplicate columns created in the merge
+        final_data = final_data.loc[:, ~final_data.columns.duplicated()]
+
+        final_data = final_data.drop_duplicates(subset=["profileURL"]).reset_index(
+            drop=True
+        )
+
+        # Cleaning the email column with list of email ids.
+        if "emails" in final_data.columns:
+            final_data["emails"] = final_data["emails"].apply(
+                HelperFunctions().clean_email
+            )
+
+        status.write("📧 Handling fallback emails for missing values...")
+        final_data.loc[final_data["emails"].isna(), "emails"] = (
+            final_data["firstName"] + "@yopmail.com"
+        )
+
+        batch["final_data"] = final_data
+        return batch
+
     @staticmethod
     def run_email_sequence_pipeline(
         keywords,
@@ -45,9 +193,14 @@ class LeadGen(metaclass=Singleton):
         sort,
         query_data,
         snov_lead_list,
+        credit_budget=None,
     ) -> pd.DataFrame:
         """
         Streamlit-compatible version of the lead generation pipeline.
+
+        API calls are charged to the query; once ``credit_budget`` credits are
+        spent (0 for no limit, None for the configured default) no further
+        enrichment calls are made and the leads gathered so far are used.
         """
 
         status = st.status("🚀 Running lead generation pipeline...", expanded=True)
@@ -55,7 +208,11 @@ class LeadGen(metaclass=Singleton):
         if "stop_process" not in st.session_state:
             st.session_state.stop_process = False
 
-        with status:
+        run_id = query_data[0]["query_id"] if query_data else "default"
+
+        with status, RetryEngine().run(run_id) as retries, UsageMeter().run(
+            run_id, credit_budget
+        ) as usage:
             st.write("📡 Connecting to MongoDB...")
             client = MongoDBClient()
 
@@ -63,8 +220,19 @@ class LeadGen(metaclass=Singleton):
                 st.warning("⚠️ Process stopped by user.")
                 return pd.DataFrame()
 
-            st.write("🔍 Fetching job openings and people data...")
-            jobs_df, company_df, people_df, posts_df, _ = Orchestrator().run_job(
+            # Only the stages whose data the steps below read are run
+            outputs = Orchestrator.demanded_outputs(
+                SnovEmailFinder.CONSUMES,
+                GetEmailSequence.CONSUMES,
+                # HelperFunctions.QUESTIONNAIRE_CONSUMES,
+            )
+
+            # Companies, prospects and emails stream through the stages: each
+            # batch of prospects reaches email finding and the LLM as soon as
+            # its profiles are ready, and Snov.io as soon as its emails are
+            stream = StreamingPipeline(status)
+            Orchestrator.add_job_stages(
+                stream,
                 client,
                 keywords,
                 location,
@@ -74,146 +242,77 @@ class LeadGen(metaclass=Singleton):
                 industry_id,
                 onsite_remote,
                 sort,
-                status=status,
-            )
-
-            if st.session_state.stop_process:
-                st.warning("⚠️ Process stopped by user.")
-                return pd.DataFrame()
-
-            st.write("📥 Collecting emails from LinkedIn URLs...")
-            email_from_url_data = SnovEmailFinder().collect_emails_from_linkedin_urls(
-                people_df
-            )
-
-            if st.session_state.stop_process:
-                st.warning("⚠️ Process stopped by user.")
-                return pd.DataFrame()
-
-            st.write("📩 Enriching missing emails...")
-            emails_data = SnovEmailFinder().enrich_missing_emails(email_from_url_data)
-
-            st.write("🔗 Merging email data with people...")
-            final_people = (
-                pd.merge(
-                    people_df,
-                    emails_data[
-                        [
-                            "profileURL",
-                            "name",
-                            "emails",
-                            "currentJob_position",
-                            "currentJob_site",
-                            "domain",
-                        ]
-                    ],
-                    on="profileURL",
-                    how="left",
-                )
-                .drop_duplicates(subset=["profileURL"])
-                .reset_index(drop=True)
-            )
-
-            if st.session_state.stop_process:
-                st.warning("⚠️ Process stopped by user.")
-                return pd.DataFrame()
-
-            # st.write("🧠 Generating questionnaire summaries...")
-            # questionnaire_response = HelperFunctions().get_questionnaire_data(
-            #     jobs_df, company_df, final_people, posts_df
-            # )
-
-            st.write("✉️ Generating email sequences...")
-            all_emails = GetEmailSequence().generate_email_sequence(
-                final_people, jobs_df, posts_df
+                outputs=outputs,
             )
-            all_emails = all_emails.dropna().reset_index(drop=True)
-
-            st.write("🧽 Formatting email output...")
-            final_emails = GetEmailSequence().format_emails(all_emails)
-
-            st.write("🧹 Cleaning bullet points in emails...")
-            email_body_cols = [f"Email Body {i}" for i in range(1, 6)]
-            for col in email_body_cols:
-                if col in final_emails.columns:
-                    final_emails[col] = final_emails[col].apply(
-                        GetEmailSequence().remove_line_breaks
-                    )
-
-            st.write("🧬 Merging all data...")
-            # final_people = pd.merge(
-            #     final_people,
-            #     questionnaire_response,
-            #     left_on="company",
-            #     right_on="Company Name",
-            #     how="left",
-            # ).drop(columns="Company Name")
-
-            final_data = pd.merge(
-                final_people,
-                final_emails,
-                left_on="profileURL",
-                right_on="LinkedIn URL",
-                how="left",
-            ).drop(columns=["First Name", "Last Name", "LinkedIn URL"])
-
-            # Adding Job Title & Job URL in the Data
-            jobs_df = jobs_df.rename(
-                columns={"title": "job_opening_title", "company_name": "company"}
+            stream.add_stage(
+                "emails",
+                lambda batch: LeadGen.find_emails(batch, stream.status),
+                workers=LeadGen.EMAIL_WORKERS,
             )
-            final_data = pd.merge(
-                final_data,
-                jobs_df[["job_opening_title", "job_url", "company"]],
-                on=["company"],
-                how="left",
+            stream.add_stage(
+                "email sequences",
+                lambda batch: LeadGen.write_email_sequences(batch, stream.status),
+                workers=LeadGen.LLM_WORKERS,
             )
 
-            # final_data = pd.merge(
-            #     final_data,
-            #     jobs_df[["company", "job_opening_title", "job_url"]],
-            #     on="company",
-            #     how="left",
-            #     suffixes=("", "_dup"),  # avoid _x/_y mess
-            # )
-
-            # Drop any duplicate columns created in the merge
-            final_data = final_data.loc[:, ~final_data.columns.duplicated()]
-
-            final_data = final_data.drop_duplicates(subset=["profileURL"]).reset_index(
-                drop=True
-            )
+            st.write("🔍 Fetching job openings and people data...")
+            inserter = InsertData()
+            leads, seen_profiles = [], set()
+            for batch in stream.run():
+                if st.session_state.stop_process:
+                    stream.stop()
+                    st.warning("⚠️ Process stopped by user.")
+                    return pd.DataFrame()
+
+                final_data = batch["final_data"]
+                final_data = final_data[
+                    ~final_data["profileURL"].isin(seen_profiles)
+                ].reset_index(drop=True)
+                if final_data.empty:
+                    continue
+                seen_profiles.update(final_data["profileURL"])
+
+                # Snov.io writes to the page, so this step stays on this thread
+                st.write("📤 Dumping data into Snov.io...")
+                Snov().dump_data_in_snov(final_data, snov_lead_list)
+
+                st.write("📤 Dumping data into MongoDB...")
+                final_data = HelperFunctions().format_final_data(final_data)
+                inserter.insert_or_upsert_to_mongo(
+                    client, "FinalData", inserter.prepare_data(final_data)
+                )
+                leads.append(final_data)
+                st.write(f"✅ {len(seen_profiles)} leads ready so far.")
 
-            # Cleaning the email column with list of email ids.
-            if "emails" in final_data.columns:
-                final_data["emails"] = final_data["emails"].apply(
-                    HelperFunctions().clean_email
+            if not leads:
+                st.warning(
+                    "⚠️ No leads found for the given filters. Please try again with different filter combinations."
                 )
+                st.stop()
+            final_data = pd.concat(leads, ignore_index=True)
 
-            st.write("📧 Handling fallback emails for missing values...")
-            final_data.loc[final_data["emails"].isna(), "emails"] = (
-                final_data["firstName"] + "@yopmail.com"
+            retry_report = retries.as_dict()
+            logger.info(f"Retries for query {run_id}: {retry_report}")
+            st.write(
+                f"🔁 Retries used: {retry_report['retries']}/{retry_report['budget']}"
             )
-
-            if st.session_state.stop_process:
-                st.warning("⚠️ Process stopped by user.")
-                return pd.DataFrame()
-
-            st.write("📤 Dumping data into Snov.io...")
-            Snov().dump_data_in_snov(final_data, snov_lead_list)
-
-            st.write("📤 Dumping data into MongoDB...")
-
-            final_data = HelperFunctions().format_final_data(final_data)
-            inserter = InsertData()
-            inserter.insert_or_upsert_to_mongo(
-                client, "FinalData", inserter.prepare_data(final_data)
+            usage_report = usage.as_dict()
+            logger.info(f"API usage for query {run_id}: {usage_report}")
+            st.write(
+                f"💳 Credits used: {usage_report['credits']:g}"
+                + (f"/{usage.budget:g}" if usage.budget else "")
+                + f" across {usage_report['calls']} API calls"
             )
+            if usage.exhausted:
+                st.warning("⚠️ Credit budget reached, results are partial.")
 
             status.update(label="✅ Pipeline completed!", state="complete")
 
             # Updating the query status in DB
             for query in query_data:
                 query["status"] = "Completed"
+                query["credits_used"] = usage_report["credits"]
+                query["credit_budget"] = usage.budget
             inserter.insert_or_upsert_to_mongo(client, "Query", query_data)
 
         return final_data
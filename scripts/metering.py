@@ -0,0 +1,253 @@
+"""
+This script contains the usage meter that counts API calls and credits per
+provider, endpoint and query, and enforces a per-query credit budget.
+"""
+
+import sys
+import os
+import logging
+import functools
+import threading
+import contextvars
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Any, Optional, Callable, Tuple
+
+from pymongo import UpdateOne
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from config.singleton import Singleton
+from config.configuration_vars import ConfigVars
+from scripts.mongo_client import MongoDBClient
+
+logger = logging.getLogger(__name__)
+
+_current_query = contextvars.ContextVar("metering_query", default="adhoc")
+
+
+class BudgetExceeded(Exception):
+    """Raised when a call would take a query over its credit budget."""
+
+
+class QueryUsage:
+    """Calls, credits and budget of one query."""
+
+    def __init__(self, query_id: str, budget: float = 0) -> None:
+        self.query_id = query_id
+        self.budget = budget
+        self.credits = 0.0
+        self.calls = 0
+        self.rejected = 0
+        self.by_endpoint: Dict[Tuple[str, str], Dict[str, float]] = defaultdict(
+            lambda: {"calls": 0, "credits": 0.0}
+        )
+        self._pending: Dict[Tuple[str, str], Dict[str, float]] = defaultdict(
+            lambda: {"calls": 0, "credits": 0.0}
+        )
+        self._lock = threading.Lock()
+
+    @property
+    def exhausted(self) -> bool:
+        """True once a budgeted query has spent all of its credits."""
+        return bool(self.budget) and self.credits >= self.budget
+
+    def charge(self, provider: str, endpoint: str, credits: float) -> int:
+        """
+        Count one call, refusing it if it would exceed the budget.
+
+        Returns:
+            int: Number of calls waiting to be flushed.
+
+        Raises:
+            BudgetExceeded: If the query has no credits left for the call.
+        """
+        with self._lock:
+            if credits and self.budget and self.credits + credits > self.budget:
+                self.rejected += 1
+                raise BudgetExceeded(
+                    f"Query {self.query_id} spent {self.credits:g}/{self.budget:g} credits"
+                )
+            self.calls += 1
+            self.credits += credits
+            for counters in (self.by_endpoint, self._pending):
+                counters[(provider, endpoint)]["calls"] += 1
+                counters[(provider, endpoint)]["credits"] += credits
+            return sum(c["calls"] for c in self._pending.values())
+
+    def take_pending(self) -> Dict[Tuple[str, str], Dict[str, float]]:
+        """Return and reset the counts not yet written to Mongo."""
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(
+                lambda: {"calls": 0, "credits": 0.0}
+            )
+            return dict(pending)
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "query_id": self.query_id,
+                "budget": self.budget,
+                "credits": self.credits,
+                "calls": self.calls,
+                "rejected_by_budget": self.rejected,
+                "by_endpoint": {
+                    f"{provider}:{endpoint}": dict(counts)
+                    for (provider, endpoint), counts in self.by_endpoint.items()
+                },
+            }
+
+
+class UsageMeter(metaclass=Singleton):
+    """
+    Meters calls to RapidAPI, Snov.io and Bedrock.
+
+    Each call is charged to the current query (see ``run``) with a credit cost
+    looked up by operation name in the optional [API_CREDITS] section, e.g.
+    ``get_company_details = 1``; provider defaults apply otherwise. Counts are
+    added to the ``ApiUsage`` collection with ``$inc``. A query run with a
+    budget (``[METERING] QUERY_BUDGET`` by default, 0 for none) refuses calls
+    that would exceed it by raising BudgetExceeded.
+    """
+
+    COLLECTION = "ApiUsage"
+
+    # Calls buffered before they are written to Mongo
+    FLUSH_EVERY = 50
+
+    DEFAULT_CREDITS: Dict[str, float] = {
+        "rapidapi": 1,
+        "bedrock": 1,
+        "snov": 0,
+        # Snov.io charges when a search is started, not when results are read
+        "emails_by_domain_by_name_search": 1,
+        "add_url_for_search": 1,
+    }
+
+    def __init__(self) -> None:
+        config = ConfigVars()
+        self.default_budget: float = config.query_budget
+        self.credit_overrides = {
+            name.lower(): float(value.strip("\"' "))
+            for name, value in config.api_credits.items()
+        }
+        self._queries: Dict[str, QueryUsage] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _config_name(endpoint: str) -> str:
+        return endpoint.strip("/").replace("-", "_").lower()
+
+    def credits_for(self, provider: str, endpoint: str) -> float:
+        """
+        Resolve the credit cost of one call.
+
+        Args:
+            provider (str): "rapidapi", "snov" or "bedrock".
+            endpoint (str): Endpoint or operation name, e.g. "/search-jobs".
+
+        Returns:
+            float: Credits charged per call.
+        """
+        name = self._config_name(endpoint)
+        if name in self.credit_overrides:
+            return self.credit_overrides[name]
+        if name in self.DEFAULT_CREDITS:
+            return self.DEFAULT_CREDITS[name]
+        return self.credit_overrides.get(provider, self.DEFAULT_CREDITS.get(provider, 1))
+
+    def usage(self, query_id: Optional[str] = None) -> QueryUsage:
+        """Return the usage of a query (the current one by default)."""
+        query_id = query_id or _current_query.get()
+        with self._lock:
+            if query_id not in self._queries:
+                self._queries[query_id] = QueryUsage(query_id)
+            return self._queries[query_id]
+
+    def exhausted(self, query_id: Optional[str] = None) -> bool:
+        """True once the query has spent its whole budget."""
+        return self.usage(query_id).exhausted
+
+    @contextmanager
+    def run(self, query_id: str, budget: Optional[float] = None):
+        """
+        Charge calls made inside the block to a query with its own budget.
+
+        Args:
+            query_id (str): Identifier of the query.
+            budget (Optional[float]): Credits the query may spend; 0 for no limit.
+        """
+        usage = QueryUsage(query_id, self.default_budget if budget is None else budget)
+        with self._lock:
+            self._queries[query_id] = usage
+        token = _current_query.set(query_id)
+        try:
+            yield usage
+        finally:
+            _current_query.reset(token)
+            self.flush(query_id)
+
+    def charge(self, provider: str, endpoint: str) -> None:
+        """
+        Charge one outgoing call to the current query.
+
+        Raises:
+            BudgetExceeded: If the query has no credits left for the call.
+        """
+        usage = self.usage()
+        if usage.charge(provider, endpoint, self.credits_for(provider, endpoint)) >= (
+            self.FLUSH_EVERY
+        ):
+            self.flush(usage.query_id)
+
+    def flush(self, query_id: Optional[str] = None) -> None:
+        """Add buffered counts to the ApiUsage collection; failures are logged."""
+        usage = self.usage(query_id)
+        pending = usage.take_pending()
+        if not pending:
+            return
+
+        now = datetime.utcnow().isoformat()
+        operations = [
+            UpdateOne(
+                {
+                    "query_id": usage.query_id,
+                    "provider": provider,
+                    "endpoint": endpoint,
+                },
+                {
+                    "$inc": {"calls": counts["calls"], "credits": counts["credits"]},
+                    "$set": {"message_date": now},
+                },
+                upsert=True,
+            )
+            for (provider, endpoint), counts in pending.items()
+        ]
+        try:
+            MongoDBClient().get_collection(self.COLLECTION).bulk_write(
+                operations, ordered=False
+            )
+        except Exception as e:
+            logger.warning(f"Could not write API usage for {usage.query_id}: {e}")
+
+
+def metered(provider: str, operation: Optional[str] = None) -> Callable:
+    """
+    Decorator charging each call of a client method to the current query.
+
+    Args:
+        provider (str): Provider name, e.g. "snov" or "bedrock".
+        operation (Optional[str]): Operation name; defaults to the method name.
+    """
+
+    def decorator(fn: Callable) -> Callable:
+        name = operation or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            UsageMeter().charge(provider, name)
+            return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -7,7 +7,6 @@ import os
 import logging
 import warnings
 import pandas as pd
-from retry import retry
 import streamlit as st
 import requests
 import time
@@ -25,6 +24,8 @@ from scripts.jobs_pipeline import JobFetcherPipeline
 from scripts.company_pipeline import CompanyFetcherPipeline
 from scripts.people_pipeline import PeopleFetcherPipeline
 from scripts.posts_pipeline import PostsFetcherPipeline
+from scripts.metering import UsageMeter
+from scripts.streaming import StreamingPipeline
 
 
 logger = logging.getLogger(__name__)
@@ -35,6 +36,190 @@ class Orchestrator:
     This is the main class which will execute step by step to pull data from Rapid API
     """
 
+    # Worker threads of the people stage, the slowest of the job stages
+    PEOPLE_WORKERS = 2
+
+    # Stages in run order; each declares the data it CONSUMES and PRODUCES
+    STAGES = [
+        JobFetcherPipeline,
+        CompanyFetcherPipeline,
+        PeopleFetcherPipeline,
+        PostsFetcherPipeline,
+    ]
+
+    @classmethod
+    def plan_stages(cls, outputs=None):
+        """
+        Pick the stages needed to produce the data downstream consumers read.
+
+        Walks the stages backwards: a stage runs if something still needed is
+        among what it produces, and then what it consumes is needed too.
+
+        Args:
+            outputs (Iterable[str], optional): Data read by the enabled
+                consumers, e.g. {"people", "jobs"}; None runs every stage.
+
+        Returns:
+            list: The stage classes to run, in run order.
+        """
+        if outputs is None:
+            return list(cls.STAGES)
+        needed = set(outputs)
+        planned = []
+        for stage in reversed(cls.STAGES):
+            if needed & set(stage.PRODUCES):
+                planned.append(stage)
+                needed |= set(stage.CONSUMES)
+        return planned[::-1]
+
+    @staticmethod
+    def demanded_outputs(*consumers):
+        """Collect the data read by the enabled downstream consumers."""
+        return {name for consumer in consumers for name in consumer}
+
+    @staticmethod
+    def add_job_stages(
+        stream,
+        client,
+        keywords,
+        location,
+        date_posted,
+        job_type,
+        function_id,
+        industry_id,
+        onsite_remote,
+        sort,
+        min_companies_required=50,
+        max_pages=10,
+        outputs=None,
+    ):
+        """
+        Add the jobs -> companies -> people -> posts stages to a streaming pipeline.
+
+        The source searches job pages and fetches and ICP-filters their
+        companies; each page's new ICP companies move on to people lookup, and
+        their people on to posts, while the next page is searched. Items are
+        dicts keyed by what the stages produce: "jobs", "companies",
+        "final_jobs", "people" and "posts".
+
+        Args:
+            stream (StreamingPipeline): Pipeline to add the stages to.
+            outputs (Iterable[str], optional): Data read by the caller's enabled
+                consumers (see plan_stages). The people and posts stages only
+                run when needed; jobs and companies always run, as the ICP
+                company count decides how many job pages are read.
+        """
+        stages = Orchestrator.plan_stages(outputs)
+        status = stream.status
+
+        jobs_pipeline = JobFetcherPipeline(mongo_client=client, status=status)
+        company_pipeline = CompanyFetcherPipeline(mongo_client=client, status=status)
+        people_pipeline = (
+            PeopleFetcherPipeline(mongo_client=client, status=status)
+            if PeopleFetcherPipeline in stages
+            else None
+        )
+        posts_pipeline = (
+            PostsFetcherPipeline(mongo_client=client, status=status)
+            if PostsFetcherPipeline in stages
+            else None
+        )
+        job_filters = {
+            "location": location,
+            "date_posted": date_posted,
+            "job_type": job_type,
+            "function_id": function_id,
+            "industry_id": industry_id,
+            "onsite_remote": onsite_remote,
+            "sort": sort,
+        }
+
+        def company_pages():
+            # Pull job pages lazily until enough unique ICP companies are found
+            company_urls, job_ids = set(), set()
+            status.write("🔍 Fetching jobs from RapidAPI...")
+            for jobs_raw in jobs_pipeline.iter_job_pages(
+                keywords, max_pages=max_pages, **job_filters
+            ):
+                page_jobs_df = jobs_pipeline.process_jobs(jobs_raw)
+                if page_jobs_df.empty:
+                    continue
+                # Known companies are looked up by their canonical URL and name
+                page_jobs_df = company_pipeline.identity.canonicalize_jobs(
+                    page_jobs_df
+                )
+                page_jobs_df = page_jobs_df[
+                    ~page_jobs_df["job_id"].isin(job_ids)
+                ].drop_duplicates(subset="job_id")
+                job_ids.update(page_jobs_df["job_id"])
+
+                # Fetch Comapny Details; companies of earlier pages move on once
+                page_company_df = company_pipeline.run(page_jobs_df)
+                if page_company_df is None or page_company_df.empty:
+                    page_company_df = pd.DataFrame()
+                else:
+                    page_company_df = page_company_df.drop_duplicates(
+                        subset="linkedinUrl"
+                    )
+                    page_company_df = page_company_df[
+                        ~page_company_df["linkedinUrl"].isin(company_urls)
+                    ].reset_index(drop=True)
+                    company_urls.update(page_company_df["linkedinUrl"].dropna())
+
+                yield {"jobs": page_jobs_df, "companies": page_company_df}
+
+                if len(company_urls) >= min_companies_required:
+                    break
+                if UsageMeter().exhausted():
+                    status.write(
+                        "💳 Credit budget spent, no more job pages will be fetched."
+                    )
+                    break
+                status.write(
+                    f"⚠️ Only {len(company_urls)} unique companies found so far, fetching the next page."
+                )
+
+            # Reruns of this search skip the jobs harvested above
+            jobs_pipeline.save_watermarks()
+
+        def find_people(batch):
+            batch["final_jobs"] = batch["people"] = pd.DataFrame()
+            if batch["companies"].empty:
+                return batch
+
+            # Combine Jobs and Company to get the companies that meet the criteria
+            batch["final_jobs"] = pd.merge(
+                batch["jobs"], batch["companies"], on="linkedinUrl", how="right"
+            )
+            if people_pipeline is not None:
+                try:
+                    batch["people"] = people_pipeline.run(batch["final_jobs"])
+                except Exception as e:
+                    logger.exception("People lookup failed for a batch of companies")
+                    status.write(f"⚠️ People lookup failed for some companies: {e}")
+            return batch
+
+        def find_posts(batch):
+            batch["posts"] = pd.DataFrame()
+            if posts_pipeline is None or batch["people"].empty:
+                return batch
+            if UsageMeter().exhausted():
+                status.write("💳 Credit budget spent, skipping LinkedIn posts.")
+                return batch
+            try:
+                batch["posts"] = posts_pipeline.run(batch["people"])
+            except Exception as e:
+                logger.exception("Posts lookup failed for a batch of prospects")
+                status.write(f"⚠️ Posts lookup failed for some prospects: {e}")
+            return batch
+
+        if posts_pipeline is None:
+            status.write("📝 No enabled step reads LinkedIn posts, skipping them.")
+
+        stream.set_source(company_pages)
+        stream.add_stage("people", find_people, workers=Orchestrator.PEOPLE_WORKERS)
+        stream.add_stage("posts", find_posts)
+
     @staticmethod
     def run_job(
         client,
@@ -47,79 +232,55 @@ class Orchestrator:
         onsite_remote,
         sort,
         status=None,
+        min_companies_required=50,
+        max_pages=10,
+        outputs=None,
     ):
+        """
+        Run the job stages to completion and return their combined data.
+
+        The stages still overlap (see add_job_stages); this only waits for
+        all of them before returning.
+
+        Returns:
+            tuple: (jobs_df, company_df, people_df, posts_df, final_jobs).
+        """
         status = status or st.status(
             "🚀 Running lead generation pipeline...", expanded=True
         )
 
-        def run_job_and_company_pipeline():
-            # Fetch Jobs based on Filter Criteria
-            jobs_pipeline = JobFetcherPipeline(mongo_client=client, status=status)
-            job_filters = {
-                "location": location,
-                "date_posted": date_posted,
-                "job_type": job_type,
-                "function_id": function_id,
-                "industry_id": industry_id,
-                "onsite_remote": onsite_remote,
-                "sort": sort,
-            }
-            jobs_df = jobs_pipeline.run(keywords=keywords, **job_filters)
-
-            if jobs_df is None:
-                return None, None
-
-            # Fetch Comapny Details
-            company_pipeline = CompanyFetcherPipeline(
-                mongo_client=client, status=status
-            )
-            company_df = company_pipeline.run(jobs_df)
-
-            return jobs_df, company_df
+        stream = StreamingPipeline(status)
+        Orchestrator.add_job_stages(
+            stream,
+            client,
+            keywords,
+            location,
+            date_posted,
+            job_type,
+            function_id,
+            industry_id,
+            onsite_remote,
+            sort,
+            min_companies_required=min_companies_required,
+            max_pages=max_pages,
+            outputs=outputs,
+        )
+        batches = list(stream.run())
 
-        # Initial run
-        jobs_df, company_df = run_job_and_company_pipeline()
+        def combine(name):
+            frames = [batch[name] for batch in batches if not batch[name].empty]
+            return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
 
-        if jobs_df is None:
+        if not batches:
             st.warning(
                 "⚠️ No new jobs found for the given filters. Please try again with different filter combinations."
             )
             st.stop()
 
-        # Loop until 15+ unique companies or 3 total attempts
-        counter = 1
-        max_attempts = 3
-        min_companies_required = 50
-
-        while (
-            company_df is not None
-            and not company_df.empty
-            and company_df["linkedinUrl"].nunique() < min_companies_required
-            and counter < max_attempts
-        ):
-            status.write(
-                f"⚠️ Only {company_df['linkedinUrl'].nunique()} unique companies found after {counter} attempts."
-            )
-
-            new_jobs_df, new_company_df = run_job_and_company_pipeline()
-
-            if new_company_df is not None and not new_company_df.empty:
-                company_df = (
-                    pd.concat([company_df, new_company_df], ignore_index=True)
-                    .drop_duplicates(subset="linkedinUrl", keep="first")
-                    .reset_index(drop=True)
-                )
-
-            if new_jobs_df is not None and not new_jobs_df.empty:
-                jobs_df = (
-                    pd.concat([jobs_df, new_jobs_df], ignore_index=True)
-                    .drop_duplicates(subset="job_id", keep="first")
-                    .reset_index(drop=True)
-                )
+        jobs_df = combine("jobs")
+        company_df = combine("companies")
 
-            counter += 1
-
-        if company_df is not None and not company_df.empty:
+        if not company_df.empty:
             status.write(
                 f"🏁 Company pipeline completed: {len(company_df)} ICP-fit companies found."
             )
@@ -129,27 +290,12 @@ class Orchestrator:
             )
             st.stop()
 
-        # Combine Jobs and Company to get the final list of companies that meet the criteria
-        if jobs_df is None or company_df is None:
-            status.write("❌ Unable to merge jobs and companies.")
-            return (
-                pd.DataFrame(),
-                pd.DataFrame(),
-                pd.DataFrame(),
-                pd.DataFrame(),
-                pd.DataFrame(),
-            )
-
-        final_jobs = pd.merge(jobs_df, company_df, on="linkedinUrl", how="right")
-
-        # Find People from the company
-        people_pipeline = PeopleFetcherPipeline(mongo_client=client, status=status)
-        people_df = people_pipeline.run(final_jobs)
-
-        # Fetch LinkedIn posts of the people
-        posts_pipeline = PostsFetcherPipeline(mongo_client=client, status=status)
-        posts_df = posts_pipeline.run(people_df)
-
         status.write("✅ Data fetched and stored successfully.")
 
-        return jobs_df, company_df, people_df, posts_df, final_jobs
+        return (
+            jobs_df,
+            company_df,
+            combine("people"),
+            combine("posts"),
+            combine("final_jobs"),
+        )
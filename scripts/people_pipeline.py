@@ -8,9 +8,6 @@ import logging
 import warnings
 import pandas as pd
 import streamlit as st
-import requests
-import time
-from retry import retry
 
 warnings.filterwarnings("ignore")
 
@@ -22,53 +19,113 @@ from config.singleton import Singleton
 from scripts.insert_data_in_db import InsertData
 from scripts.helper_functions import HelperFunctions
 from scripts.rapid_api import RapidAPI
+from scripts.async_rapid_api import AsyncRapidAPI
 from scripts.mongo_client import MongoDBClient
+from scripts.freshness import FreshnessPolicy
+from scripts.company_identity import CompanyIdentity
 
 
 logger = logging.getLogger(__name__)
 
 
 class PeopleFetcherPipeline:
+    CONSUMES = ("jobs", "companies")
+    PRODUCES = ("people",)
+
+    # Hiring teams looked up per company; 0 or None looks up every job
+    MAX_JOBS_PER_COMPANY = 5
+
+    # Profile URLs looked up per $in query against RawPeople
+    PROFILE_PREFETCH_BATCH_SIZE = 1000
+
     def __init__(self, mongo_client, status=None):
         self.client = mongo_client
         self.raw_collection = self.client.get_collection("RawPeople")
         self.clean_collection = self.client.get_collection("People")
         self.helper = HelperFunctions()
         self.inserter = InsertData()
+        self.freshness = FreshnessPolicy()
+        self.identity = CompanyIdentity(mongo_client)
         self.status = status or st.status(
             "👥 Fetching people pipeline...", expanded=True
         )
 
-    def fetch_recruiters(self, jobs_df: pd.DataFrame) -> pd.DataFrame:
+    def select_hiring_team_jobs(self, jobs_df, max_jobs_per_company=None):
+        """
+        Pick the jobs whose hiring teams are looked up: one row per job id and
+        at most ``max_jobs_per_company`` jobs per company, in listing order.
+        """
+        if max_jobs_per_company is None:
+            max_jobs_per_company = self.MAX_JOBS_PER_COMPANY
+
+        jobs = jobs_df.dropna(subset=["job_id"]).drop_duplicates(subset="job_id")
+        if max_jobs_per_company:
+            company_key = "linkedinUrl" if "linkedinUrl" in jobs else "company_name"
+            jobs = jobs[
+                jobs.groupby(company_key, dropna=False).cumcount()
+                < max_jobs_per_company
+            ]
+        return jobs.reindex(
+            columns=["job_id", "job_url", "company_name", "linkedinUrl"]
+        ).reset_index(drop=True)
+
+    def fetch_recruiters(
+        self, jobs_df: pd.DataFrame, max_jobs_per_company=None
+    ) -> pd.DataFrame:
+        """
+        Look up the hiring teams of the jobs concurrently.
+
+        Lookups go through AsyncRapidAPI, so they share the rate limiter and
+        concurrency caps of the other RapidAPI calls.
+
+        Args:
+            jobs_df (pd.DataFrame): Jobs, possibly with several rows per job.
+            max_jobs_per_company (int, optional): Cap on lookups per company,
+                defaults to MAX_JOBS_PER_COMPANY.
+        """
+        if jobs_df.empty:
+            return pd.DataFrame()
+        jobs = self.select_hiring_team_jobs(jobs_df, max_jobs_per_company)
+
+        async_api = AsyncRapidAPI()
+        responses = async_api.run(
+            async_api.gather_hiring_teams(zip(jobs["job_id"], jobs["job_url"]))
+        )
+
         recruiter_records = []
-        for _, row in jobs_df.iterrows():
-            job_id = row.get("job_id")
-            job_url = row.get("job_url")
-            company_name = row.get("company_name")
-            try:
-                response = RapidAPI().get_hiring_team(job_id, job_url)
-                items = response.get("data", {}).get("items", [])
-                if items:
-                    for item in items:
-                        item.update(
-                            {
-                                "job_id": job_id,
-                                "job_url": job_url,
-                                "company_name": company_name,
-                            }
-                        )
-                        recruiter_records.append(item)
-            except Exception as e:
-                logger.warning(f"Error fetching recruiters for job_id {job_id}: {e}")
+        for job in jobs.itertuples(index=False):
+            response = responses.get((job.job_id, job.job_url))
+            if not response:
+                logger.warning(f"Error fetching recruiters for job_id {job.job_id}")
+                continue
+            items = (response.get("data") or {}).get("items") or []
+            for item in items:
+                item.update(
+                    {
+                        "job_id": job.job_id,
+                        "job_url": job.job_url,
+                        "company_name": job.company_name,
+                    }
+                )
+                recruiter_records.append(item)
 
         self.status.write(f"👥 Total Hiring Managers found : {len(recruiter_records)}")
         return pd.DataFrame(recruiter_records)
 
-    def fetch_people_by_company(self, company: str, search_keywords: list) -> list:
+    def fetch_people_by_company(
+        self, company: str, search_keywords: list, company_id=None
+    ) -> list:
+        """
+        Search people at a company, by its companyId when its identity is known
+        (a name can be shared by several companies), else by its name.
+        """
         results = []
         for keyword in search_keywords:
             try:
-                response = RapidAPI().search_people(keywords=keyword, company=company)
+                response = RapidAPI().search_people(
+                    keywords=keyword,
+                    company=str(company_id) if company_id is not None else company,
+                )
                 items = response.get("data", {}).get("items", [])
                 for item in items:
                     item["company_name"] = company
@@ -100,130 +157,150 @@ class PeopleFetcherPipeline:
             "Human Resource, HR, Talent Acquisition, IT Recruiter, Founder",
         ]  # "CTO, Chief Technology Officer, COO, CXO, VP, Vice President, Co-Founder, CEO, MD, Director",
         companies = remaining_jobs["company_name"].dropna().unique()
+        identities = self.identity.resolve_job_companies(remaining_jobs)
         people_data = [
             person
             for company in companies
-            for person in self.fetch_people_by_company(company, search_keywords)
+            for person in self.fetch_people_by_company(
+                company,
+                search_keywords,
+                company_id=identities.get(company, {}).get("companyId"),
+            )
         ]
         return pd.DataFrame(people_data)
 
-    @retry(tries=5, delay=2, backoff=2)
-    def fetch_profile(self, link):
-        try:
-            existing = list(
-                self.raw_collection.find(
-                    {"profileURL": link},
-                    {"_id": 0, "message_date": 0, "company_name": 0},
+    def fetch_cached_profiles(self, links):
+        """
+        Return the stored profiles of the links, with their last fetch message_date.
+
+        Profiles are prefetched in batches of $in queries answered by the
+        profileURL index instead of one query per link.
+
+        Returns:
+            dict: {profileURL: profile} for the links found in RawPeople.
+        """
+        links = list(links)
+        cached = {}
+        for start in range(0, len(links), self.PROFILE_PREFETCH_BATCH_SIZE):
+            batch = links[start : start + self.PROFILE_PREFETCH_BATCH_SIZE]
+            try:
+                cursor = self.raw_collection.find(
+                    {"profileURL": {"$in": batch}},
+                    {"_id": 0, "company_name": 0},
                 )
-            )
-            if existing:
-                return existing[0]
+                for doc in cursor:
+                    cached.setdefault(doc.get("profileURL"), doc)
+            except Exception as e:
+                logger.warning(f"Error reading cached profiles: {e}")
+        return cached
 
-            response = RapidAPI().get_linkedin_profile_data_by_url(link)
-            if isinstance(response, requests.Response) and response.status_code == 429:
-                raise requests.exceptions.HTTPError("429 Too Many Requests")
+    @staticmethod
+    def gather_profiles(links):
+        """Fetch profiles from the API, tagged with the link they came from."""
+        async_api = AsyncRapidAPI()
+        responses = async_api.run(async_api.gather_profiles(links))
+        profiles = []
+        for link, response in responses.items():
             if response:
                 response["profileURL"] = link
-            return response
-        except requests.exceptions.HTTPError as e:
-            if "429" in str(e):
-                logger.warning(f"Rate limit hit for {link}. Retrying...")
-                raise
-            logger.warning(f"HTTPError for {link}: {e}")
-        except Exception as e:
-            logger.warning(f"Error fetching profile for {link}: {e}")
-        return {}
-
-    def enrich_profiles(self, people_df: pd.DataFrame) -> pd.DataFrame:
-        self.status.write("📄 Fetching LinkedIn profiles...")
+                profiles.append(response)
+            else:
+                logger.warning(f"No profile data returned for {link}")
+        return profiles
+
+    def refresh_profiles(self, links):
+        """Refetch stale profiles off the main thread and store them in RawPeople."""
+        profiles = self.gather_profiles(links)
+        if profiles:
+            self.inserter.insert_or_upsert_to_mongo(
+                self.client,
+                "RawPeople",
+                self.inserter.prepare_data(pd.DataFrame(profiles)),
+            )
+
+    def fetch_profiles(self, links):
+        """
+        Serve profiles from RawPeople when they are fresh enough.
+
+        Stale profiles are served and refreshed in the background; expired or
+        unknown ones are fetched before returning.
+
+        Returns:
+            tuple: (profiles, links fetched from the API in this call).
+        """
         profiles = []
-        for link in people_df["profileURL"].dropna().unique():
-            profiles.append(self.fetch_profile(link))
-            time.sleep(2)
+        missing = []
+        stale = []
+        cached_profiles = self.fetch_cached_profiles(links)
+        for link in links:
+            cached = cached_profiles.get(link)
+            state = self.freshness.state(
+                "profile", cached.pop("message_date", None) if cached else None
+            )
+            if state == FreshnessPolicy.EXPIRED:
+                missing.append(link)
+                continue
+            profiles.append(cached)
+            if state == FreshnessPolicy.STALE:
+                stale.append(link)
+
+        if stale:
+            self.freshness.refresh_in_background(
+                "profile", stale, self.refresh_profiles
+            )
+
+        fetched = self.gather_profiles(missing) if missing else []
+        profiles.extend(fetched)
+        return profiles, {profile["profileURL"] for profile in fetched}
+
+    def enrich_profiles(self, people_df: pd.DataFrame):
+        """
+        Attach LinkedIn profiles to people.
+
+        Returns:
+            tuple: (profiles merged with people, links fetched from the API).
+        """
+        self.status.write("📄 Fetching LinkedIn profiles...")
+        profiles, fetched_links = self.fetch_profiles(
+            people_df["profileURL"].dropna().unique()
+        )
         profiles_df = pd.DataFrame(profiles)
+        if "profileURL" not in profiles_df:
+            profiles_df["profileURL"] = None
         profiles_df = pd.merge(
             profiles_df,
             people_df[["profileURL", "company_name"]],
             on="profileURL",
             how="right",
         )
-        return profiles_df
+        return profiles_df, fetched_links
 
     def process_profiles(self, profiles_df):
-        selected = [
-            "id",
-            "profileURL",
-            "company_name",
-            "username",
-            "firstName",
-            "lastName",
-            "headline",
-            "geo",
-            "educations",
-            "position",
-            "fullPositions",
-            "skills",
-            "summary",
-            "volunteering",
-        ]
-        final = profiles_df[
-            [col for col in selected if col in profiles_df.columns]
-        ].copy()
-        final["processed_fullPositions"] = (
-            final["fullPositions"].dropna().apply(self.helper.process_full_positions)
-        )
-        final["latest_experience"] = final.apply(
-            lambda row: self.helper.find_relevant_experience(
-                row["processed_fullPositions"], None
-            ),
-            axis=1,
-        )
-        final = pd.concat(
-            [
-                final.drop(columns=["latest_experience", "geo"], errors="ignore"),
-                pd.json_normalize(final["latest_experience"]),
-                pd.json_normalize(final["geo"]),
-            ],
-            axis=1,
-        )
-        final["clean_skills"] = final["skills"].apply(self.helper.process_skills)
-        final.rename(
-            columns={"company_name": "company", "full": "full_address"}, inplace=True
-        )
-        drop_cols = [
-            "start.year",
-            "start.month",
-            "start.day",
-            "end.year",
-            "end.month",
-            "end.day",
-            "educations",
-            "position",
-            "fullPositions",
-            "skills",
-            "volunteering",
-            "id",
-            "country",
-            "city",
-            "countryCode",
-        ]
-        final.drop(
-            columns=[col for col in drop_cols if col in final.columns], inplace=True
-        )
-        return final
+        """Flatten raw profiles into the People columns in a single pass."""
+        return self.helper.flatten_profiles(profiles_df, company_column="company_name")
 
-    def run(self, final_jobs_df):
+    def run(self, final_jobs_df, max_jobs_per_company=None):
         self.status.write("👥 Starting Prospect data pipeline...")
-        recruiter_df = self.fetch_recruiters(final_jobs_df)
+        recruiter_df = self.fetch_recruiters(final_jobs_df, max_jobs_per_company)
         recruiter_df.rename(columns={"url": "profileURL"}, inplace=True)
 
+        # Jobs left out by the per-company cap were never looked up, so they
+        # must not count as jobs without recruiters
+        if not final_jobs_df.empty:
+            final_jobs_df = self.select_hiring_team_jobs(
+                final_jobs_df, max_jobs_per_company
+            )
         people_df = self.collect_people_data(recruiter_df, final_jobs_df)
         final_people_df = pd.concat([people_df, recruiter_df], ignore_index=True)
 
-        profiles_df = self.enrich_profiles(final_people_df)
-        self.inserter.insert_or_upsert_to_mongo(
-            self.client, "RawPeople", self.inserter.prepare_data(profiles_df)
-        )
+        profiles_df, fetched_links = self.enrich_profiles(final_people_df)
+        # Only newly fetched profiles are stored, so message_date stays the
+        # time of the last fetch for profiles served from RawPeople
+        fetched_df = profiles_df[profiles_df["profileURL"].isin(fetched_links)]
+        if not fetched_df.empty:
+            self.inserter.insert_or_upsert_to_mongo(
+                self.client, "RawPeople", self.inserter.prepare_data(fetched_df)
+            )
 
         final_people = self.process_profiles(profiles_df)
         self.inserter.insert_or_upsert_to_mongo(
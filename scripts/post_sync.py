@@ -0,0 +1,110 @@
+"""
+This script contains the per-user post sync markers that let the posts
+pipeline store only the posts published since the previous sync.
+"""
+
+import sys
+import os
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Any, Optional, Iterable, List
+
+from pymongo import UpdateOne
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+logger = logging.getLogger(__name__)
+
+
+class PostSyncState:
+    """
+    Newest ``postedDateTimestamp`` synced per username, stored in ``PostSyncState``.
+
+    /get-profile-posts always returns a user's latest posts; everything up to
+    the marker has been stored by an earlier sync, so only newer posts are
+    written. ``message_date`` records when the user was last synced, which is
+    what the posts freshness window is checked against.
+    """
+
+    COLLECTION = "PostSyncState"
+
+    def __init__(self, mongo_client) -> None:
+        self.collection = mongo_client.get_collection(self.COLLECTION)
+        self._loaded: Dict[str, Dict[str, Any]] = {}
+        self._synced: Dict[str, Optional[float]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def posted_at(post: Dict[str, Any]) -> Optional[float]:
+        """Return a post's postedDateTimestamp as a number, or None if missing."""
+        try:
+            return float(post.get("postedDateTimestamp"))
+        except (TypeError, ValueError):
+            return None
+
+    def load(self, usernames: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Read the markers of several users in one query.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: {username: {"postedDateTimestamp",
+            "message_date"}} for users synced before.
+        """
+        usernames = [u for u in dict.fromkeys(usernames) if u not in self._loaded]
+        if usernames:
+            try:
+                docs = list(self.collection.find({"_id": {"$in": usernames}}))
+            except Exception as e:
+                logger.warning(f"Could not read post sync markers: {e}")
+                docs = []
+            with self._lock:
+                for username in usernames:
+                    self._loaded.setdefault(username, {})
+                for doc in docs:
+                    self._loaded[doc.pop("_id")] = doc
+        return {u: doc for u, doc in self._loaded.items() if doc}
+
+    def new_posts(self, username: str, posts: List[Dict[str, Any]]):
+        """
+        Keep the posts published after the user's marker and remember the sync.
+
+        Posts come newest first, but a pinned post can lead the list, so every
+        post is compared with the marker rather than stopping at the first
+        known one. Posts without a timestamp are kept.
+
+        Returns:
+            list: Posts not stored by an earlier sync.
+        """
+        marker = self.load([username]).get(username, {}).get("postedDateTimestamp")
+        newest = max(filter(None, map(self.posted_at, posts)), default=None)
+        with self._lock:
+            self._synced[username] = newest
+        if marker is None:
+            return posts
+        return [
+            post
+            for post in posts
+            if self.posted_at(post) is None or self.posted_at(post) > marker
+        ]
+
+    def save(self) -> None:
+        """Advance the markers of the users synced since the last save."""
+        with self._lock:
+            synced, self._synced = self._synced, {}
+        if not synced:
+            return
+
+        now = datetime.utcnow().isoformat()
+        operations = []
+        for username, newest in synced.items():
+            update = {"$set": {"message_date": now}}
+            if newest is not None:
+                update["$max"] = {"postedDateTimestamp": newest}
+            operations.append(UpdateOne({"_id": username}, update, upsert=True))
+            with self._lock:
+                self._loaded.pop(username, None)
+        try:
+            self.collection.bulk_write(operations, ordered=False)
+        except Exception as e:
+            logger.warning(f"Could not save post sync markers: {e}")
@@ -8,10 +8,6 @@ import logging
 import warnings
 import pandas as pd
 import streamlit as st
-import requests
-import time
-from retry import retry
-from datetime import datetime, timedelta
 
 
 warnings.filterwarnings("ignore")
@@ -23,91 +19,240 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from config.singleton import Singleton
 from scripts.insert_data_in_db import InsertData
 from scripts.helper_functions import HelperFunctions
-from scripts.rapid_api import RapidAPI
+from scripts.async_rapid_api import AsyncRapidAPI
 from scripts.mongo_client import MongoDBClient
+from scripts.freshness import FreshnessPolicy
+from scripts.post_sync import PostSyncState
 
 
 logger = logging.getLogger(__name__)
 
 
 class PostsFetcherPipeline:
-    def __init__(self, mongo_client, status=None):
+    CONSUMES = ("people",)
+    PRODUCES = ("posts",)
+
+    # Stored posts served per user, the size of a /get-profile-posts page
+    POSTS_PER_USER = 50
+
+    # Post fields clean_posts drops, so they are never read back from RawPosts
+    DROPPED_FIELDS = [
+        "isBrandPartnership",
+        "totalReactionCount",
+        "likeCount",
+        "empathyCount",
+        "commentsCount",
+        "shareUrl",
+        "postedAt",
+        "postedDateTimestamp",
+        "urn",
+        "company",
+        "document",
+        "celebration",
+        "entity",
+        "companyMentions",
+        "InterestCount",
+        "praiseCount",
+        "repostsCount",
+        "image",
+        "mentions",
+        "appreciationCount",
+        "video",
+        "funnyCount",
+        "article",
+    ]
+
+    def __init__(self, mongo_client, status=None, incremental=True):
+        """
+        Args:
+            incremental (bool): Store only the posts published since each
+                user's previous sync instead of every fetched post.
+        """
         self.client = mongo_client
         self.raw_collection = mongo_client.get_collection("RawPosts")
         self.clean_collection = mongo_client.get_collection("Posts")
         self.helper = HelperFunctions()
         self.inserter = InsertData()
+        self.freshness = FreshnessPolicy()
+        self.incremental = incremental
+        self.sync = PostSyncState(mongo_client)
         self.status = status or st.status(
             "📝 Fetching LinkedIn posts...", expanded=True
         )
 
-    def fetch_existing_posts(self, username):
-        """Return posts from last 30 days for given username."""
-        cutoff_date = (datetime.utcnow() - timedelta(days=30)).isoformat()
-        return list(
-            self.raw_collection.find(
-                {"username": username, "message_date": {"$gte": cutoff_date}},
-                {"_id": 0, "message_date": 0},
-            )
-        )
+    def fetch_existing_posts(self, usernames):
+        """
+        Return the stored posts of the usernames within the posts freshness window.
+
+        One aggregation walks the (username, postedDateTimestamp) index newest
+        first and keeps only the latest POSTS_PER_USER posts of every requested
+        user, without the fields clean_posts drops. In incremental mode posts
+        are only written when first seen, so every stored post is considered
+        and freshness comes from the sync markers.
+
+        Returns:
+            dict: {username: (newest message_date, posts)} for users with posts.
+        """
+        usernames = list(usernames)
+        if not usernames:
+            return {}
+        match = {"username": {"$in": usernames}}
+        if not self.incremental:
+            match["message_date"] = {"$gte": self.freshness.cutoff("posts")}
+        pipeline = [
+            {"$match": match},
+            # Both keys descending, so the ascending index is walked backwards
+            {"$sort": {"username": -1, "postedDateTimestamp": -1}},
+            {
+                "$project": {
+                    "_id": 0,
+                    **{field: 0 for field in self.DROPPED_FIELDS},
+                }
+            },
+            {
+                "$group": {
+                    "_id": "$username",
+                    "newest": {"$max": "$message_date"},
+                    "posts": {
+                        "$firstN": {"n": self.POSTS_PER_USER, "input": "$$ROOT"}
+                    },
+                }
+            },
+        ]
+        existing = {}
+        for group in self.raw_collection.aggregate(pipeline):
+            for post in group["posts"]:
+                post.pop("message_date", None)
+            existing[group["_id"]] = (group["newest"], group["posts"])
+        return existing
+
+    @staticmethod
+    def extract_posts(username, response):
+        """Tag each post in an API response with the username it belongs to."""
+        posts = (response or {}).get("data") or []
+        for post in posts:
+            post["username"] = username
+        return posts
 
-    @retry(tries=5, delay=2, backoff=2)
-    def fetch_posts_for_user(self, username):
-        try:
-            posts = RapidAPI().get_linkedin_posts_by_username(username).get("data", [])
-            for post in posts:
-                post["username"] = username
+    def gather_posts(self, usernames):
+        """
+        Fetch the posts of usernames from the API.
+
+        Returns:
+            tuple: (posts, usernames whose fetch returned a response).
+        """
+        async_api = AsyncRapidAPI()
+        responses = async_api.run(async_api.gather_posts(usernames))
+        posts, fetched = [], []
+        for username, response in responses.items():
+            if not response or "data" not in response:
+                logger.warning(f"Could not fetch posts of {username}")
+                continue
+            fetched.append(username)
+            posts.extend(self.extract_posts(username, response))
+        return posts, fetched
+
+    def select_new_posts(self, usernames, posts, sync=None):
+        """
+        Keep the fetched posts that have to be stored.
+
+        In incremental mode these are the posts published after each user's
+        sync marker, and every user in ``usernames`` counts as synced (even one
+        without posts), so only users whose fetch succeeded should be passed;
+        otherwise every fetched post is kept.
+        """
+        if not self.incremental:
             return posts
-        except Exception as e:
-            logger.warning(f"Error fetching posts for {username}: {e}")
-            return []
+        sync = sync or self.sync
+        by_user = {username: [] for username in usernames}
+        for post in posts:
+            by_user.setdefault(post["username"], []).append(post)
+        return [
+            post
+            for username, user_posts in by_user.items()
+            for post in sync.new_posts(username, user_posts)
+        ]
+
+    def store_posts(self, new_posts_df, clean_df=None):
+        """
+        Write new posts to RawPosts and their cleaned form to Posts.
+
+        Args:
+            new_posts_df (pd.DataFrame): Raw posts to store.
+            clean_df (pd.DataFrame, optional): Already cleaned posts, of which
+                those in ``new_posts_df`` are stored.
+        """
+        if new_posts_df.empty:
+            return
+        self.inserter.insert_or_upsert_to_mongo(
+            self.client, "RawPosts", self.inserter.prepare_data(new_posts_df)
+        )
+        if clean_df is None:
+            clean_df = self.clean_posts(new_posts_df.copy())
+        elif "postUrl" in clean_df and "postUrl" in new_posts_df:
+            clean_df = clean_df[clean_df["postUrl"].isin(new_posts_df["postUrl"])]
+        self.inserter.insert_or_upsert_to_mongo(
+            self.client, "Posts", self.inserter.prepare_data(clean_df)
+        )
+
+    def refresh_posts(self, usernames):
+        """Refetch stale posts off the main thread and store the new ones."""
+        # A separate marker set, so the run's own markers are saved by the run
+        sync = PostSyncState(self.client)
+        posts, fetched = self.gather_posts(usernames)
+        new_posts = self.select_new_posts(fetched, posts, sync)
+        self.store_posts(pd.DataFrame(new_posts))
+        sync.save()
 
     def get_new_posts(self, usernames):
-        """Return existing posts if present, else fetch from API and return."""
+        """
+        Return stored posts when fresh enough, else fetch them from the API.
+
+        A username's posts are as fresh as the newest one stored. Stale posts
+        are served and refreshed in the background.
+
+        Returns:
+            tuple: (all posts, fetched posts that have to be stored).
+        """
         all_posts = []
+        missing = []
+        stale = []
 
+        cached = self.fetch_existing_posts(usernames)
+        synced = self.sync.load(usernames) if self.incremental else {}
         for username in usernames:
-            existing = self.fetch_existing_posts(username)
+            newest, existing = cached.get(username, (None, []))
+            synced_at = synced.get(username, {}).get("message_date")
+            state = self.freshness.state(
+                "posts", max(filter(None, [newest, synced_at]), default=None)
+            )
+
+            if state == FreshnessPolicy.EXPIRED:
+                missing.append(username)
+                continue
+            logger.info(f"✅ Found {len(existing)} posts in DB for {username}")
+            all_posts.extend(existing)
+            if state == FreshnessPolicy.STALE:
+                stale.append(username)
 
-            if existing:
-                logger.info(f"✅ Found {len(existing)} posts in DB for {username}")
-                all_posts.extend(existing)
-            else:
-                logger.info(f"🔍 No posts in DB for {username}, calling API...")
-                posts = self.fetch_posts_for_user(username)
-                all_posts.extend(posts)
-                time.sleep(1)
+        if stale:
+            self.freshness.refresh_in_background("posts", stale, self.refresh_posts)
+
+        fetched, fetched_users = [], []
+        if missing:
+            logger.info(
+                f"🔍 No recent posts in DB for {len(missing)} users, calling API..."
+            )
+            fetched, fetched_users = self.gather_posts(missing)
+            all_posts.extend(fetched)
 
-        return pd.DataFrame(all_posts)
+        # Users whose fetch failed keep their marker and are retried next run
+        new_posts = self.select_new_posts(fetched_users, fetched)
+        return pd.DataFrame(all_posts), pd.DataFrame(new_posts)
 
     def clean_posts(self, posts_df):
         """Drop irrelevant fields and standardize structure."""
-        drop_columns = [
-            "isBrandPartnership",
-            "totalReactionCount",
-            "likeCount",
-            "empathyCount",
-            "commentsCount",
-            "shareUrl",
-            "postedAt",
-            "postedDateTimestamp",
-            "urn",
-            "company",
-            "document",
-            "celebration",
-            "entity",
-            "companyMentions",
-            "InterestCount",
-            "praiseCount",
-            "repostsCount",
-            "image",
-            "mentions",
-            "appreciationCount",
-            "video",
-            "funnyCount",
-            "article",
-        ]
-        posts_df.drop(columns=drop_columns, inplace=True, errors="ignore")
+        posts_df.drop(columns=self.DROPPED_FIELDS, inplace=True, errors="ignore")
 
         posts_df = posts_df.assign(
             repost=posts_df.get("reposted", False).fillna(False),
@@ -122,20 +267,20 @@ class PostsFetcherPipeline:
     def run(self, final_people_df):
         self.status.write("📝 Fetching LinkedIn posts...")
         usernames = final_people_df["username"].dropna().unique()
-        posts_df = self.get_new_posts(usernames)
+        posts_df, new_posts_df = self.get_new_posts(usernames)
 
         if posts_df.empty:
+            self.sync.save()
             self.status.write("📝 No posts found.")
             return pd.DataFrame()
 
-        self.inserter.insert_or_upsert_to_mongo(
-            self.client, "RawPosts", self.inserter.prepare_data(posts_df)
-        )
-
+        # Only posts not stored before are written; posts served from RawPosts
+        # keep the message_date of their first fetch
         clean_df = self.clean_posts(posts_df)
-        self.inserter.insert_or_upsert_to_mongo(
-            self.client, "Posts", self.inserter.prepare_data(clean_df)
-        )
+        self.store_posts(new_posts_df, clean_df)
+        self.sync.save()
 
-        self.status.write(f"✅ {len(clean_df)} posts processed.")
+        self.status.write(
+            f"✅ {len(clean_df)} posts processed, {len(new_posts_df)} new."
+        )
         return clean_df
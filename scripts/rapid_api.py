@@ -5,19 +5,34 @@ This scripts is used to pull data from Rapid API for Lead Gen.
 import sys
 import os
 import time
-import random
+from datetime import timedelta
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 import requests
-from typing import Dict, Any, Optional
+from requests.adapters import HTTPAdapter
+from pymongo.errors import PyMongoError
+from typing import Dict, Any, Optional, Iterator, List
 import logging
 from ast import literal_eval
 from config.singleton import Singleton
 from config.configuration_vars import ConfigVars
+from scripts.rate_limiter import RateLimiter
+from scripts.response_cache import ResponseCache
+from scripts.single_flight import SingleFlight, MongoLease
+from scripts.mongo_client import MongoDBClient
+from scripts.cassette import Cassette
+from scripts.circuit_breaker import CircuitBreakerRegistry, CircuitOpenError
+from scripts.retry_policy import RetryEngine
+from scripts.metering import UsageMeter, BudgetExceeded
+from scripts.freshness import FreshnessPolicy
 
 logger = logging.getLogger(__name__)
 
 
+class JobSearchError(Exception):
+    """Raised when a page of job search results could not be fetched."""
+
+
 class RapidAPI(metaclass=Singleton):
     """
     A singleton class to interact with the LinkedIn Data API via RapidAPI.
@@ -26,6 +41,9 @@ class RapidAPI(metaclass=Singleton):
     company, and post data using various endpoints from the RapidAPI platform.
     """
 
+    # Number of results the search-jobs endpoint returns per page
+    JOBS_PAGE_SIZE = 25
+
     def __init__(self) -> None:
         """Initialize with base URL and API key from configuration."""
         config = ConfigVars()
@@ -41,7 +59,70 @@ class RapidAPI(metaclass=Singleton):
             "x-rapidapi-key": self.api_key,
             "x-rapidapi-host": self._extract_host(self.base_url),
             "Content-Type": "application/json",
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive",
         }
+        self.cassette: Cassette = Cassette()
+        if self.cassette.replaying:
+            # Serve recorded exchanges from the local stand-in server
+            self.base_url = f"{self.cassette.replay_url}/rapidapi"
+        self.timeout: float = config.rapid_api_timeout
+        self.rate_limiter: RateLimiter = RateLimiter()
+        self.breakers: CircuitBreakerRegistry = CircuitBreakerRegistry()
+        self.retry_engine: RetryEngine = RetryEngine()
+        self.meter: UsageMeter = UsageMeter()
+        self.cache: ResponseCache = ResponseCache()
+        self.freshness: FreshnessPolicy = FreshnessPolicy()
+        self.single_flight: SingleFlight = SingleFlight()
+        self.leases: Optional[MongoLease] = self._build_leases(config.lease_seconds)
+        self.session: requests.Session = self._build_session(
+            config.rapid_api_pool_size
+        )
+
+    def _build_session(self, pool_size: int) -> requests.Session:
+        """
+        Build a keep-alive session shared by every endpoint method.
+
+        All calls go to the same RapidAPI host, so a single pooled adapter lets
+        requests reuse TCP/TLS connections instead of handshaking on each call.
+
+        Args:
+            pool_size (int): Maximum number of connections kept open to the host.
+
+        Returns:
+            requests.Session: Session with pooled adapters and default headers.
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=pool_size, pool_block=True
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update(self.headers)
+        return session
+
+    @staticmethod
+    def _build_leases(lease_seconds: float) -> Optional[MongoLease]:
+        """
+        Build the cross-process lease store used to coalesce identical calls.
+
+        Args:
+            lease_seconds (float): Lease lifetime; 0 disables cross-process leases.
+
+        Returns:
+            Optional[MongoLease]: Lease store, or None if disabled/unavailable.
+        """
+        if lease_seconds <= 0:
+            return None
+        try:
+            return MongoLease(MongoDBClient(), lease_seconds)
+        except Exception as e:
+            logger.warning(f"Cross-process leases unavailable: {e}")
+            return None
+
+    def close(self) -> None:
+        """Close the pooled session and release its connections."""
+        self.session.close()
 
     def _extract_host(self, url: str) -> str:
         """
@@ -56,40 +137,240 @@ class RapidAPI(metaclass=Singleton):
         return url.replace("https://", "").replace("http://", "").split("/")[0]
 
     def _make_request(
-        self, endpoint: str, params: Dict[str, Any], delay_seconds: float = 5.0
+        self,
+        endpoint: str,
+        params: Dict[str, Any],
+        use_cache: bool = True,
+        freshness: Optional[str] = None,
     ) -> Optional[Dict[str, Any]]:
         """
         Internal method to perform a GET request to a specific API endpoint.
 
+        Responses are served from the TTL-aware response cache when possible.
+        Requests that do go out are paced by the endpoint's token bucket, which
+        adapts to the rate-limit headers and 429s returned by RapidAPI.
+
+        Args:
+            endpoint (str): API endpoint to call.
+            params (Dict[str, Any]): Dictionary of query parameters.
+            use_cache (bool): Read from and write to the response cache.
+            freshness (Optional[str]): Entity type whose freshness policy
+                applies; stale cached responses are then served and refreshed
+                in the background.
+
+        Returns:
+            Optional[Dict[str, Any]]: Parsed JSON response or None if the request fails.
+        """
+        if not use_cache:
+            payload = None
+        elif freshness:
+            payload = self._cached_by_freshness(endpoint, params, freshness)
+        else:
+            payload = self.cache.get(endpoint, params)
+        if payload is not None:
+            logger.info(f"Cache hit for {endpoint} | Params: {params}")
+        else:
+            # Identical calls in flight share one upstream request
+            key = self.cache.key(endpoint, params)
+            payload = self.single_flight.do(
+                key, lambda: self._fetch_shared(endpoint, params, key, use_cache)
+            )
+
+        if payload is not None:
+            self.cassette.record("rapidapi", endpoint, params, payload)
+        return payload
+
+    def _cached_by_freshness(
+        self, endpoint: str, params: Dict[str, Any], entity: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Serve a cached response according to the entity's freshness policy.
+
+        Returns:
+            Optional[Dict[str, Any]]: The cached payload if fresh or stale
+            (stale ones are refreshed in the background), else None.
+        """
+        entry = self.cache.get_entry(endpoint, params)
+        age = (
+            timedelta(seconds=max(0.0, time.time() - entry["cached_at"]))
+            if entry
+            else None
+        )
+        state = self.freshness.state_for_age(entity, age)
+        if state == FreshnessPolicy.EXPIRED:
+            return None
+
+        if state == FreshnessPolicy.STALE:
+            key = self.cache.key(endpoint, params)
+            self.freshness.refresh_in_background(
+                entity,
+                [key],
+                lambda _: self.single_flight.do(
+                    key, lambda: self._fetch_shared(endpoint, params, key, True)
+                ),
+            )
+        return entry["payload"]
+
+    def _fetch_shared(
+        self, endpoint: str, params: Dict[str, Any], key: str, use_cache: bool
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Fetch a response on behalf of every caller waiting on the same key.
+
+        When another process already holds the lease for the key, wait for its
+        result to appear in the shared cache instead of calling the API again.
+        If the lease store cannot be reached, the call goes out without one.
+
+        Args:
+            endpoint (str): API endpoint to call.
+            params (Dict[str, Any]): Dictionary of query parameters.
+            key (str): Cache key of the call.
+            use_cache (bool): Read from and write to the response cache.
+
+        Returns:
+            Optional[Dict[str, Any]]: Parsed JSON response or None if the request fails.
+        """
+        # Peers can only share results through the cache
+        leases = self.leases if use_cache and self.cache.backend else None
+        try:
+            has_lease = leases is not None and leases.acquire(key)
+        except PyMongoError as e:
+            logger.warning(f"Could not take lease for {endpoint}, calling anyway: {e}")
+            leases, has_lease = None, False
+
+        if leases is not None and not has_lease:
+            payload = self._wait_for_peer(endpoint, params, key)
+            if payload is not None:
+                return payload
+
+        try:
+            payload = self._send_request(endpoint, params)
+            if use_cache and payload is not None:
+                self.cache.set(endpoint, params, payload)
+            return payload
+        finally:
+            if has_lease:
+                try:
+                    leases.release(key)
+                except PyMongoError as e:
+                    # The lease expires on its own
+                    logger.warning(f"Could not release lease for {endpoint}: {e}")
+
+    def _wait_for_peer(
+        self, endpoint: str, params: Dict[str, Any], key: str, poll_seconds: float = 0.5
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Poll the shared cache while another process holds the lease for a key.
+
+        Returns:
+            Optional[Dict[str, Any]]: The peer's cached response, or None if the
+            lease lapsed without a result.
+        """
+        deadline = time.monotonic() + self.leases.lease_seconds
+        while time.monotonic() < deadline:
+            payload = self.cache.get(endpoint, params, record_stats=False)
+            if payload is not None:
+                logger.info(f"Shared in-flight result for {endpoint} | Params: {params}")
+                return payload
+            try:
+                if not self.leases.is_held(key):
+                    break
+            except PyMongoError as e:
+                logger.warning(f"Could not check lease for {endpoint}: {e}")
+                break
+            time.sleep(poll_seconds)
+        return self.cache.get(endpoint, params, record_stats=False)
+
+    def _send_request(
+        self, endpoint: str, params: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Send a GET request to RapidAPI, bypassing the cache.
+
+        Transient failures (429, 5xx, timeouts, connection errors, invalid
+        JSON) are retried by the shared retry engine.
+
         Args:
             endpoint (str): API endpoint to call.
             params (Dict[str, Any]): Dictionary of query parameters.
-            delay_seconds (float): Delay before each request to avoid throttling.
 
         Returns:
             Optional[Dict[str, Any]]: Parsed JSON response or None if the request fails.
         """
         url = f"{self.base_url}{endpoint}"
         try:
-            logger.info(f"GET {url} | Params: {params}")
-            time.sleep(delay_seconds + random.uniform(0.5, 1.5))  # jitter
-            response = requests.get(
-                url, headers=self.headers, params=params, timeout=30
+            return self.retry_engine.call(
+                f"rapidapi:{endpoint}", self._send_once, endpoint, params
             )
-            response.raise_for_status()
-            try:
-                return response.json()
-            except ValueError as e:
-                logger.error(f"Invalid JSON response from {url}: {e}")
-                return None
+        except (CircuitOpenError, BudgetExceeded) as e:
+            logger.warning(f"{e}, skipping {params}")
         except requests.HTTPError as e:
             logger.error(
-                f"HTTPError for {url}: {e} | Response: {e.response.text if e.response else 'No response'}"
+                f"HTTPError for {url}: {e} | Response: {e.response.text if e.response is not None else 'No response'}"
             )
         except requests.RequestException as e:
             logger.error(f"Request to {url} failed: {e}")
+        except ValueError as e:
+            logger.error(f"Invalid JSON response from {url}: {e}")
         return None
 
+    def _send_once(self, endpoint: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Make a single rate-limited attempt at a request.
+
+        Each endpoint has a circuit breaker: 429s, 5xx, timeouts, connection
+        errors and invalid JSON count as failures, and while the circuit is
+        open the attempt is rejected without touching the network. Attempts
+        the breaker admits are charged to the current query's credit budget.
+
+        Args:
+            endpoint (str): API endpoint to call.
+            params (Dict[str, Any]): Dictionary of query parameters.
+
+        Returns:
+            Dict[str, Any]: Parsed JSON response.
+
+        Raises:
+            CircuitOpenError: If the endpoint's circuit is open.
+            BudgetExceeded: If the query has no credits left.
+            requests.RequestException: On HTTP errors and transport failures.
+            ValueError: If the body is not valid JSON.
+        """
+        url = f"{self.base_url}{endpoint}"
+        breaker = self.breakers.get(f"rapidapi:{endpoint}")
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuit open for {endpoint}")
+        # Only admitted calls are charged; a rejected charge gives back the
+        # half-open probe slot so the circuit is not stuck half-open
+        try:
+            self.meter.charge("rapidapi", endpoint)
+        except BudgetExceeded:
+            breaker.release()
+            raise
+
+        try:
+            logger.info(f"GET {url} | Params: {params}")
+            self.rate_limiter.acquire(endpoint)
+            response = self.session.get(url, params=params, timeout=self.timeout)
+            self.rate_limiter.observe(
+                endpoint, response.status_code, response.headers
+            )
+            response.raise_for_status()
+            payload = response.json()
+        except requests.HTTPError as e:
+            status = e.response.status_code if e.response is not None else None
+            if status is None or status == 429 or status >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            raise
+        except (requests.RequestException, ValueError):
+            breaker.record_failure()
+            raise
+
+        breaker.record_success()
+        return payload
+
     def search_jobs(
         self,
         keywords: Optional[str] = None,
@@ -102,6 +383,7 @@ class RapidAPI(metaclass=Singleton):
         # experience_level: Optional[str],
         sort: str = "mostRecent",
         date_posted: str = "pastMonth",
+        start: int = 0,
     ) -> Optional[Dict[str, Any]]:
         """
         Search job postings with various filters.
@@ -120,9 +402,12 @@ class RapidAPI(metaclass=Singleton):
                                   Other options include "mostRelevant".
             date_posted (str, optional): Time frame for when the job was posted.
                     Defaults to "pastMonth". Other options include "past24Hours", "pastWeek".
+            start (int, optional): Offset of the first result, a multiple of
+                    JOBS_PAGE_SIZE. Defaults to 0.
 
         Returns:
-            Optional[Dict[str, Any]]: Job search results.
+            Optional[Dict[str, Any]]: Job search results, or None if the request
+            failed (as opposed to a search without results).
         """
         payload = self._make_request(
             "/search-jobs",
@@ -135,12 +420,47 @@ class RapidAPI(metaclass=Singleton):
                 "industryIds": industry_id,
                 "onsiteRemote": onsite_remote,
                 "sort": sort,
-                "start": "0",
+                "start": str(start),
             },
         )
 
+        if payload is None:
+            return None
         return {k: v for k, v in payload.items() if v is not None}
 
+    def iter_job_pages(
+        self, max_pages: Optional[int] = None, **filters
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Lazily yield pages of job postings for one search.
+
+        Pages are requested only when the caller asks for the next one, so a
+        caller can stop as soon as it has collected enough results.
+
+        Args:
+            max_pages (Optional[int]): Upper bound on the number of pages to fetch.
+            **filters: Filters forwarded to search_jobs (keywords, location, ...).
+
+        Yields:
+            List[Dict[str, Any]]: Job postings of one page.
+
+        Raises:
+            JobSearchError: If a page could not be fetched, so callers can tell
+                a failed page from the end of the results.
+        """
+        page = 0
+        while max_pages is None or page < max_pages:
+            response = self.search_jobs(start=page * self.JOBS_PAGE_SIZE, **filters)
+            if response is None:
+                raise JobSearchError(f"Job search page {page} failed for {filters}")
+            jobs = response.get("data") or []
+            if not jobs:
+                return
+            yield jobs
+            if len(jobs) < self.JOBS_PAGE_SIZE:
+                return
+            page += 1
+
     def get_hiring_team(self, job_id: str, job_url: str) -> Optional[Dict[str, Any]]:
         """
         Retrieve hiring team information for a specific job.
@@ -153,7 +473,11 @@ class RapidAPI(metaclass=Singleton):
         Returns:
             Optional[Dict[str, Any]]: Hiring team data.
         """
-        return self._make_request("/get-hiring-team", {"id": job_id, "url": job_url})
+        return self._make_request(
+            "/get-hiring-team",
+            {"id": job_id, "url": job_url},
+            freshness="hiring_team",
+        )
 
     def search_people(
         self,
@@ -0,0 +1,256 @@
+"""
+This script contains the adaptive token-bucket rate limiter used to pace
+calls to external APIs.
+"""
+
+import sys
+import os
+import time
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional, Mapping
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from config.singleton import Singleton
+from config.configuration_vars import ConfigVars
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket whose refill rate adapts to upstream feedback.
+
+    Callers reserve a token and receive the number of seconds they have to
+    wait before sending their request. The rate is halved on throttling and
+    increased step by step while the upstream reports headroom; without
+    headroom reports it only recovers up to the configured rate.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        min_rate: Optional[float] = None,
+        max_rate: Optional[float] = None,
+        max_wait: float = 60.0,
+    ) -> None:
+        """
+        Args:
+            rate (float): Initial requests per second.
+            burst (int): Maximum number of tokens that can accumulate.
+            min_rate (Optional[float]): Lower bound when slowing down.
+            max_rate (Optional[float]): Upper bound when speeding up.
+            max_wait (float): Longest pause taken from a header or Retry-After.
+        """
+        self.rate = float(rate)
+        self.configured_rate = self.rate
+        self.burst = max(1, int(burst))
+        self.min_rate = float(min_rate) if min_rate else self.rate / 10
+        self.max_rate = float(max_rate) if max_rate else self.rate * 4
+        self.max_wait = max_wait
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+        self._updated = now
+
+    def reserve(self) -> float:
+        """
+        Take one token, queueing behind earlier reservations if necessary.
+
+        Returns:
+            float: Seconds the caller must wait before sending the request.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, self._blocked_until - now)
+
+    def block_for(self, seconds: float) -> None:
+        """Hold back every caller for the given number of seconds."""
+        seconds = min(max(seconds, 0.0), self.max_wait)
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def slow_down(self, factor: float = 0.5) -> None:
+        """Multiplicatively decrease the refill rate."""
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * factor)
+            self._tokens = min(self._tokens, 0.0)
+
+    def speed_up(
+        self, step: Optional[float] = None, ceiling: Optional[float] = None
+    ) -> None:
+        """
+        Additively increase the refill rate.
+
+        Args:
+            step (Optional[float]): Increase, defaults to ``min_rate``.
+            ceiling (Optional[float]): Rate not to exceed, below ``max_rate``.
+        """
+        with self._lock:
+            top = min(self.max_rate, ceiling) if ceiling else self.max_rate
+            if self.rate < top:
+                self.rate = min(top, self.rate + (step or self.min_rate))
+
+
+class RateLimiter(metaclass=Singleton):
+    """
+    Keeps one adaptive token bucket per endpoint.
+
+    Limits come from DEFAULT_LIMITS and can be overridden per endpoint from the
+    optional [RATE_LIMITS] section of the secrets file, e.g.
+    ``search_jobs = "0.5, 2"`` for 0.5 requests/sec with a burst of 2.
+    """
+
+    DEFAULT_LIMITS: Dict[str, Dict[str, float]] = {
+        "default": {"rate": 1.0, "burst": 3},
+        "/search-jobs": {"rate": 0.5, "burst": 2},
+        "/search-people": {"rate": 0.5, "burst": 2},
+    }
+
+    # Share of the upstream quota below which we back off / above which we speed up
+    LOW_HEADROOM = 0.1
+    HIGH_HEADROOM = 0.5
+
+    REMAINING_HEADERS = ("x-ratelimit-requests-remaining", "ratelimit-remaining")
+    LIMIT_HEADERS = ("x-ratelimit-requests-limit", "ratelimit-limit")
+    RESET_HEADERS = ("x-ratelimit-requests-reset", "ratelimit-reset")
+
+    def __init__(self) -> None:
+        self._overrides = self._parse_overrides(ConfigVars().rate_limits)
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _parse_overrides(raw: Mapping[str, str]) -> Dict[str, Dict[str, float]]:
+        overrides = {}
+        for name, value in raw.items():
+            try:
+                rate, burst = [float(v) for v in value.strip("\"' ").split(",")]
+                overrides[name.lower()] = {"rate": rate, "burst": burst}
+            except ValueError:
+                logger.warning(f"Ignoring invalid rate limit '{name} = {value}'")
+        return overrides
+
+    @staticmethod
+    def _config_name(endpoint: str) -> str:
+        return endpoint.strip("/").replace("-", "_").lower() or "default"
+
+    def limits_for(self, endpoint: str) -> Dict[str, float]:
+        """
+        Resolve the configured rate and burst for an endpoint.
+
+        Args:
+            endpoint (str): API endpoint, e.g. "/search-jobs".
+
+        Returns:
+            Dict[str, float]: {"rate": requests/sec, "burst": tokens}.
+        """
+        name = self._config_name(endpoint)
+        if name in self._overrides:
+            return self._overrides[name]
+        if endpoint in self.DEFAULT_LIMITS:
+            return self.DEFAULT_LIMITS[endpoint]
+        return self._overrides.get("default", self.DEFAULT_LIMITS["default"])
+
+    def bucket(self, endpoint: str) -> TokenBucket:
+        """Return the bucket for an endpoint, creating it on first use."""
+        with self._lock:
+            if endpoint not in self._buckets:
+                limits = self.limits_for(endpoint)
+                self._buckets[endpoint] = TokenBucket(limits["rate"], limits["burst"])
+            return self._buckets[endpoint]
+
+    def acquire(self, endpoint: str) -> float:
+        """
+        Block until a request to the endpoint is allowed.
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        wait = self.bucket(endpoint).reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    @staticmethod
+    def _header(headers: Mapping[str, str], names) -> Optional[float]:
+        for name in names:
+            value = headers.get(name)
+            if value is None:
+                continue
+            try:
+                return float(str(value).split(",")[0].split(";")[0])
+            except ValueError:
+                continue
+        return None
+
+    @staticmethod
+    def parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """
+        Parse a Retry-After header given either as seconds or as an HTTP date.
+
+        Returns:
+            Optional[float]: Seconds to wait, or None if absent/unparseable.
+        """
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+            return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            return None
+
+    def observe(
+        self, endpoint: str, status_code: int, headers: Mapping[str, Any]
+    ) -> None:
+        """
+        Adapt the endpoint's bucket to the upstream response.
+
+        Args:
+            endpoint (str): API endpoint that was called.
+            status_code (int): HTTP status code of the response.
+            headers (Mapping[str, Any]): Response headers (case-insensitive mapping).
+        """
+        bucket = self.bucket(endpoint)
+
+        if status_code == 429:
+            retry_after = self.parse_retry_after(headers.get("Retry-After"))
+            bucket.slow_down()
+            bucket.block_for(retry_after if retry_after is not None else 1 / bucket.rate)
+            logger.warning(
+                f"Throttled on {endpoint}; rate lowered to {bucket.rate:.2f} req/s"
+            )
+            return
+
+        remaining = self._header(headers, self.REMAINING_HEADERS)
+        limit = self._header(headers, self.LIMIT_HEADERS)
+
+        if remaining is None:
+            # Without a quota to go by, only recover from earlier slow-downs
+            if 200 <= status_code < 300:
+                bucket.speed_up(ceiling=bucket.configured_rate)
+            return
+
+        if remaining <= 0:
+            reset = self._header(headers, self.RESET_HEADERS)
+            bucket.slow_down()
+            bucket.block_for(reset if reset is not None else 1 / bucket.rate)
+        elif limit and remaining / limit < self.LOW_HEADROOM:
+            bucket.slow_down(0.8)
+        elif not limit or remaining / limit > self.HIGH_HEADROOM:
+            bucket.speed_up()
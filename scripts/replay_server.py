@@ -0,0 +1,153 @@
+"""
+This script runs a local stand-in for RapidAPI, Snov.io and Bedrock that
+serves exchanges recorded in a cassette, with configurable latency and
+injected 429s.
+
+Usage:
+    python scripts/replay_server.py --directory cassettes --latency 0.8 --throttle-rate 0.05
+"""
+
+import sys
+import os
+import json
+import time
+import random
+import logging
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from scripts.cassette import CassetteStore
+
+logger = logging.getLogger(__name__)
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    """
+    Serves recorded exchanges.
+
+    RapidAPI calls arrive as ``GET /rapidapi/<endpoint>?<params>`` exactly as
+    the client would send them upstream; Snov.io and Bedrock calls arrive as
+    ``POST /<provider>/<operation>`` with a JSON body ``{"params": {...}}``.
+    """
+
+    server_version = "LeadGenReplay/1.0"
+
+    def _split_path(self):
+        path = urlsplit(self.path).path.strip("/")
+        provider, _, operation = path.partition("/")
+        return provider, operation
+
+    def _send_json(self, status, body, headers=None):
+        payload = json.dumps(body).encode("UTF-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _serve(self, provider, operation, params, wrap):
+        server = self.server
+        time.sleep(max(0.0, server.latency + random.uniform(0, server.jitter)))
+
+        if random.random() < server.throttle_rate:
+            self._send_json(
+                429,
+                {"message": "Too many requests (injected)"},
+                {"Retry-After": str(server.retry_after)},
+            )
+            return
+
+        exchange = server.store.load(provider, operation, params)
+        if exchange is None:
+            logger.warning(f"No recording for {provider}/{operation} {params}")
+            self._send_json(404, {"message": "Exchange not found in cassette"})
+            return
+
+        response = exchange["response"]
+        self._send_json(200, {"response": response} if wrap else response)
+
+    def do_GET(self):
+        provider, operation = self._split_path()
+        params = dict(parse_qsl(urlsplit(self.path).query, keep_blank_values=True))
+        self._serve(provider, operation, params, wrap=False)
+
+    def do_POST(self):
+        provider, operation = self._split_path()
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(400, {"message": "Body must be JSON"})
+            return
+        self._serve(provider, operation, body.get("params", {}), wrap=True)
+
+    def log_message(self, format, *args):
+        logger.info("%s - %s", self.address_string(), format % args)
+
+
+def serve(
+    directory,
+    host="127.0.0.1",
+    port=8765,
+    latency=0.0,
+    jitter=0.0,
+    throttle_rate=0.0,
+    retry_after=1,
+):
+    """
+    Start the stand-in server and block until interrupted.
+
+    Args:
+        directory (str): Cassette directory written in record mode.
+        host (str): Interface to bind.
+        port (int): Port to listen on.
+        latency (float): Base delay in seconds added to every response.
+        jitter (float): Extra random delay in seconds, uniform in [0, jitter].
+        throttle_rate (float): Share of requests answered with a 429.
+        retry_after (int): Retry-After seconds sent with injected 429s.
+    """
+    server = ThreadingHTTPServer((host, port), ReplayHandler)
+    server.store = CassetteStore(directory)
+    server.latency = latency
+    server.jitter = jitter
+    server.throttle_rate = throttle_rate
+    server.retry_after = retry_after
+    logger.info(f"Replaying cassette '{directory}' on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        handlers=[logging.StreamHandler(sys.stdout)],
+    )
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--directory", default="cassettes")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    args = parser.parse_args()
+
+    serve(
+        args.directory,
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        throttle_rate=args.throttle_rate,
+        retry_after=args.retry_after,
+    )
@@ -0,0 +1,282 @@
+"""
+This script contains the persistent response cache that sits beneath
+RapidAPI._make_request.
+"""
+
+import sys
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Optional
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from config.singleton import Singleton
+from config.configuration_vars import ConfigVars
+from scripts.mongo_client import MongoDBClient
+
+logger = logging.getLogger(__name__)
+
+
+class MongoCacheBackend:
+    """
+    Stores cached responses in the ``ApiCache`` collection.
+
+    Entries carry an ``expires_at`` date covered by a TTL index, so Mongo
+    removes them on its own once they expire.
+    """
+
+    COLLECTION = "ApiCache"
+
+    def __init__(self, mongo_client) -> None:
+        self.collection = mongo_client.get_collection(self.COLLECTION)
+        self.collection.create_index("expires_at", expireAfterSeconds=0)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        doc = self.collection.find_one(
+            {"_id": key, "expires_at": {"$gt": datetime.utcnow()}},
+            {"payload": 1, "cached_at": 1},
+        )
+        if not doc:
+            return None
+        cached_at = doc.get("cached_at")
+        return {
+            "payload": doc["payload"],
+            "cached_at": (
+                cached_at.replace(tzinfo=timezone.utc).timestamp() if cached_at else 0
+            ),
+        }
+
+    def set(self, key: str, endpoint: str, payload: Dict[str, Any], ttl: float):
+        now = datetime.utcnow()
+        self.collection.update_one(
+            {"_id": key},
+            {
+                "$set": {
+                    "endpoint": endpoint,
+                    "payload": payload,
+                    "cached_at": now,
+                    "expires_at": now + timedelta(seconds=ttl),
+                }
+            },
+            upsert=True,
+        )
+
+
+class DiskCacheBackend:
+    """
+    Stores cached responses as JSON files under a local directory.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        try:
+            with open(path, encoding="UTF-8") as cached:
+                entry = json.load(cached)
+        except (OSError, ValueError):
+            return None
+
+        if entry.get("expires_at", 0) <= time.time():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        return {"payload": entry.get("payload"), "cached_at": entry.get("cached_at", 0)}
+
+    def set(self, key: str, endpoint: str, payload: Dict[str, Any], ttl: float):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        entry = {
+            "endpoint": endpoint,
+            "payload": payload,
+            "cached_at": time.time(),
+            "expires_at": time.time() + ttl,
+        }
+        # Write then rename so concurrent readers never see a partial file
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="UTF-8") as cached:
+            json.dump(entry, cached)
+        os.replace(tmp_path, path)
+
+
+class ResponseCache(metaclass=Singleton):
+    """
+    TTL-aware cache of RapidAPI responses keyed on endpoint plus normalized params.
+
+    The backend is chosen with ``BACKEND`` ("mongo", "disk" or "off") in the
+    optional [CACHE] section of the secrets file. Per-endpoint TTLs (seconds)
+    can be overridden in [CACHE_TTLS], e.g. ``search_jobs = 3600``.
+    """
+
+    HOUR = 60 * 60
+    DAY = 24 * HOUR
+
+    DEFAULT_TTLS: Dict[str, float] = {
+        "default": DAY,
+        "/search-jobs": 6 * HOUR,
+        # Served stale (and refreshed in the background) after a day
+        "/get-hiring-team": 7 * DAY,
+        "/search-people": 3 * DAY,
+        "/get-profile-data-by-url": 7 * DAY,
+        "/get-profile-posts": DAY,
+        "/get-profile-comments": DAY,
+        "/get-company-details": 7 * DAY,
+        "/get-company-details-by-id": 7 * DAY,
+        "/get-company-posts": DAY,
+    }
+
+    def __init__(self) -> None:
+        config = ConfigVars()
+        self.ttl_overrides = {
+            name.lower(): float(value.strip("\"' "))
+            for name, value in config.cache_ttls.items()
+        }
+        self.backend = self._build_backend(config.cache_backend, config.cache_dir)
+        self.hits: Dict[str, int] = defaultdict(int)
+        self.misses: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _build_backend(name: str, directory: str):
+        if name == "off":
+            return None
+        if name == "disk":
+            return DiskCacheBackend(directory)
+        try:
+            return MongoCacheBackend(MongoDBClient())
+        except Exception as e:
+            logger.warning(f"Mongo cache unavailable ({e}), using disk cache instead")
+            return DiskCacheBackend(directory)
+
+    @staticmethod
+    def normalize_params(params: Dict[str, Any]) -> Dict[str, str]:
+        """
+        Normalize query params so equivalent calls share a cache entry.
+
+        None values are dropped, values are stripped strings and URLs lose
+        their trailing slash.
+        """
+        normalized = {}
+        for name, value in params.items():
+            if value is None:
+                continue
+            value = str(value).strip()
+            if value.startswith(("http://", "https://")):
+                value = value.rstrip("/")
+            normalized[name] = value
+        return dict(sorted(normalized.items()))
+
+    @classmethod
+    def key(cls, endpoint: str, params: Dict[str, Any]) -> str:
+        """
+        Build the cache key for an endpoint call.
+
+        Args:
+            endpoint (str): API endpoint, e.g. "/search-jobs".
+            params (Dict[str, Any]): Query parameters.
+
+        Returns:
+            str: Hex digest identifying the call.
+        """
+        raw = json.dumps(
+            {"endpoint": endpoint, "params": cls.normalize_params(params)},
+            sort_keys=True,
+        )
+        return hashlib.sha256(raw.encode("UTF-8")).hexdigest()
+
+    def ttl_for(self, endpoint: str) -> float:
+        """Return the TTL in seconds for an endpoint."""
+        name = endpoint.strip("/").replace("-", "_").lower()
+        if name in self.ttl_overrides:
+            return self.ttl_overrides[name]
+        return self.DEFAULT_TTLS.get(endpoint, self.DEFAULT_TTLS["default"])
+
+    def get(
+        self, endpoint: str, params: Dict[str, Any], record_stats: bool = True
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached response.
+
+        Args:
+            endpoint (str): API endpoint, e.g. "/search-jobs".
+            params (Dict[str, Any]): Query parameters.
+            record_stats (bool): Count the lookup in the hit/miss counters.
+
+        Returns:
+            Optional[Dict[str, Any]]: Cached payload, or None on a miss.
+        """
+        entry = self.get_entry(endpoint, params, record_stats)
+        return entry["payload"] if entry else None
+
+    def get_entry(
+        self, endpoint: str, params: Dict[str, Any], record_stats: bool = True
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached response along with the time it was cached.
+
+        Returns:
+            Optional[Dict[str, Any]]: {"payload": ..., "cached_at": epoch seconds},
+            or None on a miss.
+        """
+        if self.backend is None or self.ttl_for(endpoint) <= 0:
+            return None
+
+        try:
+            entry = self.backend.get(self.key(endpoint, params))
+        except Exception as e:
+            logger.warning(f"Cache read failed for {endpoint}: {e}")
+            entry = None
+
+        if not record_stats:
+            return entry
+
+        with self._lock:
+            if entry is None:
+                self.misses[endpoint] += 1
+            else:
+                self.hits[endpoint] += 1
+        return entry
+
+    def set(
+        self, endpoint: str, params: Dict[str, Any], payload: Dict[str, Any]
+    ) -> None:
+        """Store a successful response under the endpoint's TTL."""
+        ttl = self.ttl_for(endpoint)
+        if self.backend is None or ttl <= 0 or not payload:
+            return
+        if isinstance(payload, dict) and payload.get("success") is False:
+            return
+
+        try:
+            self.backend.set(self.key(endpoint, params), endpoint, payload, ttl)
+        except Exception as e:
+            logger.warning(f"Cache write failed for {endpoint}: {e}")
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Return hit/miss counters per endpoint.
+
+        Returns:
+            Dict[str, Dict[str, int]]: {endpoint: {"hits": n, "misses": m}}.
+        """
+        with self._lock:
+            endpoints = set(self.hits) | set(self.misses)
+            return {
+                endpoint: {
+                    "hits": self.hits[endpoint],
+                    "misses": self.misses[endpoint],
+                }
+                for endpoint in sorted(endpoints)
+            }
@@ -0,0 +1,208 @@
+"""
+This script contains the retry engine shared by every external API client
+(RapidAPI, Snov.io and Bedrock).
+"""
+
+import sys
+import os
+import time
+import random
+import logging
+import functools
+import threading
+import contextvars
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Callable
+
+import requests
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from config.singleton import Singleton
+from config.configuration_vars import ConfigVars
+from scripts.rate_limiter import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+_current_run = contextvars.ContextVar("retry_run", default="default")
+
+
+class RunRetryStats:
+    """Retry budget and counters for one pipeline run."""
+
+    def __init__(self, budget: int) -> None:
+        self.budget = budget
+        self.used = 0
+        self.by_category: Counter = Counter()
+        self.by_operation: Counter = Counter()
+        self.exhausted = 0
+        self._lock = threading.Lock()
+
+    def spend(self, operation: str, category: str) -> bool:
+        """Take one retry from the budget; False once it is spent."""
+        with self._lock:
+            if self.used >= self.budget:
+                self.exhausted += 1
+                return False
+            self.used += 1
+            self.by_category[category] += 1
+            self.by_operation[operation] += 1
+            return True
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "budget": self.budget,
+                "retries": self.used,
+                "denied_by_budget": self.exhausted,
+                "by_category": dict(self.by_category),
+                "by_operation": dict(self.by_operation),
+            }
+
+
+class RetryEngine(metaclass=Singleton):
+    """
+    Retries transient failures with decorrelated jitter and a per-run budget.
+
+    Errors are classified as ``rate_limited`` (429), ``server_error`` (5xx),
+    ``timeout``, ``connection`` or ``parse``; anything else is raised at once.
+    Retry-After is honoured when the upstream sends it. Settings come from the
+    optional [RETRY] section (MAX_ATTEMPTS, BASE_DELAY, MAX_DELAY, RUN_BUDGET).
+    """
+
+    def __init__(self) -> None:
+        settings = ConfigVars().retry
+        self.max_attempts: int = settings["max_attempts"]
+        self.base_delay: float = settings["base_delay"]
+        self.max_delay: float = settings["max_delay"]
+        self.run_budget: int = settings["run_budget"]
+        self._runs: Dict[str, RunRetryStats] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def classify(error: BaseException) -> Optional[str]:
+        """
+        Map an exception to a retryable category.
+
+        Returns:
+            Optional[str]: Category name, or None if the error is not retryable.
+        """
+        status = getattr(error, "status_code", None)
+        response = getattr(error, "response", None)
+        if status is None and response is not None:
+            status = getattr(response, "status_code", None)
+
+        if status == 429:
+            return "rate_limited"
+        if isinstance(status, int) and status >= 500:
+            return "server_error"
+        if isinstance(status, int):
+            return None
+
+        name = type(error).__name__
+        if isinstance(error, (requests.Timeout, TimeoutError)) or "Timeout" in name:
+            return "timeout"
+        if isinstance(error, (requests.ConnectionError, ConnectionError)) or (
+            "Connection" in name
+        ):
+            return "connection"
+        if isinstance(error, ValueError):  # includes JSONDecodeError
+            return "parse"
+        return None
+
+    @staticmethod
+    def retry_after(error: BaseException) -> Optional[float]:
+        """Return the Retry-After delay carried by an error's response, if any."""
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None) or {}
+        return RateLimiter.parse_retry_after(headers.get("Retry-After"))
+
+    def stats(self, run_id: Optional[str] = None) -> RunRetryStats:
+        """Return the stats of a run (the current one by default)."""
+        run_id = run_id or _current_run.get()
+        with self._lock:
+            if run_id not in self._runs:
+                self._runs[run_id] = RunRetryStats(self.run_budget)
+            return self._runs[run_id]
+
+    @contextmanager
+    def run(self, run_id: str, budget: Optional[int] = None):
+        """
+        Attribute retries made inside the block to a run with its own budget.
+
+        Args:
+            run_id (str): Identifier of the run, e.g. the query_id.
+            budget (Optional[int]): Retries allowed for the whole run.
+        """
+        with self._lock:
+            self._runs[run_id] = RunRetryStats(
+                self.run_budget if budget is None else budget
+            )
+        token = _current_run.set(run_id)
+        try:
+            yield self._runs[run_id]
+        finally:
+            _current_run.reset(token)
+
+    def report(self, run_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Summarize the retries used by a run.
+
+        Returns:
+            Dict[str, Any]: Budget, retries used and breakdowns per category/operation.
+        """
+        return self.stats(run_id).as_dict()
+
+    def call(self, operation: str, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Call ``fn`` and retry transient failures.
+
+        Args:
+            operation (str): Name used in logs and counters, e.g. "rapidapi:/search-jobs".
+            fn (Callable): Function performing one attempt.
+
+        Returns:
+            Any: Result of the first successful attempt.
+        """
+        delay = self.base_delay
+        attempt = 1
+        while True:
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                category = self.classify(e)
+                if category is None or attempt >= self.max_attempts:
+                    raise
+                if not self.stats().spend(operation, category):
+                    logger.warning(f"Retry budget spent, giving up on {operation}")
+                    raise
+
+                # Decorrelated jitter, never shorter than the upstream asks for
+                delay = min(self.max_delay, random.uniform(self.base_delay, delay * 3))
+                wait = max(delay, self.retry_after(e) or 0)
+                logger.warning(
+                    f"{operation} failed ({category}: {e}); retry {attempt} in {wait:.1f}s"
+                )
+                time.sleep(wait)
+                attempt += 1
+
+
+def with_retries(provider: str, operation: Optional[str] = None) -> Callable:
+    """
+    Decorator running a client method through the retry engine.
+
+    Args:
+        provider (str): Provider name, e.g. "snov" or "bedrock".
+        operation (Optional[str]): Operation name; defaults to the method name.
+    """
+
+    def decorator(fn: Callable) -> Callable:
+        name = f"{provider}:{operation or fn.__name__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            return RetryEngine().call(name, fn, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
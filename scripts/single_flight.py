@@ -0,0 +1,117 @@
+"""
+This script contains the request coalescing helpers used so that identical
+concurrent API calls share a single upstream request.
+"""
+
+import os
+import copy
+import uuid
+import socket
+import logging
+import threading
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict
+
+from pymongo import errors
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Coalesces identical calls made concurrently within this process.
+
+    The first caller for a key runs the function; callers arriving while it is
+    in flight wait on the same future and receive a copy of its result (or its
+    exception), so each caller can still mutate what it gets back.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """
+        Run ``fn`` once per key among concurrent callers.
+
+        Args:
+            key (str): Identity of the call.
+            fn (Callable[[], Any]): Function performing the call.
+
+        Returns:
+            Any: Result of the shared call.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+
+        if not leader:
+            return copy.deepcopy(future.result())
+
+        try:
+            result = fn()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+
+class MongoLease:
+    """
+    Short-lived cross-process leases stored in the ``ApiLeases`` collection.
+
+    A process holding the lease for a key performs the upstream call; other
+    processes wait for its result to land in the shared response cache.
+    Leases expire on their own so a crashed holder cannot block others.
+    """
+
+    COLLECTION = "ApiLeases"
+
+    def __init__(self, mongo_client, lease_seconds: float = 30) -> None:
+        self.collection = mongo_client.get_collection(self.COLLECTION)
+        self.collection.create_index("expires_at", expireAfterSeconds=0)
+        self.lease_seconds = lease_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    def acquire(self, key: str) -> bool:
+        """
+        Try to take the lease for a key.
+
+        Returns:
+            bool: True if this process now holds the lease.
+        """
+        now = datetime.utcnow()
+        lease = {
+            "owner": self.owner,
+            "expires_at": now + timedelta(seconds=self.lease_seconds),
+        }
+        try:
+            self.collection.insert_one({"_id": key, **lease})
+            return True
+        except errors.DuplicateKeyError:
+            # Take over a lease whose holder let it lapse
+            taken = self.collection.find_one_and_update(
+                {"_id": key, "expires_at": {"$lte": now}}, {"$set": lease}
+            )
+            return taken is not None
+
+    def is_held(self, key: str) -> bool:
+        """Return True while another process holds an unexpired lease."""
+        return (
+            self.collection.count_documents(
+                {"_id": key, "expires_at": {"$gt": datetime.utcnow()}}, limit=1
+            )
+            > 0
+        )
+
+    def release(self, key: str) -> None:
+        """Release a lease held by this process."""
+        self.collection.delete_one({"_id": key, "owner": self.owner})
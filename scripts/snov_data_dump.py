@@ -12,6 +12,10 @@ import streamlit as st
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from config.singleton import Singleton
 from config.configuration_vars import ConfigVars
+from scripts.cassette import cassette
+from scripts.circuit_breaker import circuit_breaker
+from scripts.retry_policy import with_retries
+from scripts.metering import metered
 
 
 class Snov(metaclass=Singleton):
@@ -24,6 +28,7 @@ class Snov(metaclass=Singleton):
         self.client_id = literal_eval(config.snov_user_id)
         self.client_secret = literal_eval(config.snov_secret_key)
 
+    @cassette("snov", placeholder="cassette-token")
     def get_token(self):
         """
         This function is used to generate token
@@ -41,19 +46,28 @@ class Snov(metaclass=Singleton):
 
         return json.loads(resText)["access_token"]
 
+    @with_retries("snov")
+    @circuit_breaker("snov")
+    @metered("snov")
+    @cassette("snov")
     def get_user_lists(self):
         token = self.get_token()
         params = {"access_token": token}
 
         res = requests.get("https://api.snov.io/v1/get-user-lists", params=params)
+        res.raise_for_status()
 
         return json.loads(res.text)
 
+    @circuit_breaker("snov")
+    @metered("snov")
+    @cassette("snov")
     def create_prospect_list(self, name):
         token = self.get_token()
         params = {"access_token": token, "name": name}
 
         res = requests.post("https://api.snov.io/v1/lists", data=params)
+        res.raise_for_status()
 
         return json.loads(res.text)
 
@@ -64,6 +78,10 @@ class Snov(metaclass=Singleton):
         """
         return {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
 
+    @with_retries("snov")
+    @circuit_breaker("snov")
+    @metered("snov")
+    @cassette("snov")
     def add_prospect_to_list(
         self,
         lead_list_id,
@@ -149,6 +167,7 @@ class Snov(metaclass=Singleton):
         }
 
         res = requests.post("https://api.snov.io/v1/add-prospect-to-list", data=params)
+        res.raise_for_status()
 
         return json.loads(res.text)
 
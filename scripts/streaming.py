@@ -0,0 +1,210 @@
+"""
+This script contains a small streaming pipeline that runs stages on worker
+threads connected by bounded queues, so each item moves to the next stage as
+soon as it is ready instead of waiting for the whole batch.
+"""
+
+import sys
+import os
+import queue
+import logging
+import threading
+import contextvars
+from typing import Any, Callable, Iterable, Iterator, List, Optional
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+class StatusRelay:
+    """
+    Stand-in for a Streamlit status container on worker threads.
+
+    Streamlit can only be written to from the script thread, so messages are
+    queued and written by ``StreamingPipeline.run`` on that thread.
+    """
+
+    def __init__(self, pipeline: "StreamingPipeline") -> None:
+        self._pipeline = pipeline
+
+    def write(self, message: Any) -> None:
+        self._pipeline._emit("write", message)
+
+
+class _Stage:
+    def __init__(self, name: str, fn: Callable[[Any], Any], workers: int) -> None:
+        self.name = name
+        self.fn = fn
+        self.workers = workers
+        self.remaining = workers
+        self.lock = threading.Lock()
+
+
+class StreamingPipeline:
+    """
+    A source followed by stages, each running on its own worker threads.
+
+    Stages are linked by bounded queues, so a fast stage waits for a slow one
+    instead of buffering the whole batch. A stage function takes one item and
+    returns the item for the next stage, or None to drop it. Worker threads
+    run in a copy of the caller's context, so API usage and retries are still
+    charged to the current query.
+
+    Usage:
+        stream = StreamingPipeline(status)
+        stream.set_source(lambda: pages)
+        stream.add_stage("people", find_people, workers=2)
+        for item in stream.run():
+            ...
+    """
+
+    # Items buffered between two stages
+    QUEUE_SIZE = 4
+
+    # Seconds between checks for a stopped pipeline while a queue is full
+    POLL_SECONDS = 0.2
+
+    def __init__(self, status=None, queue_size: Optional[int] = None) -> None:
+        self.target_status = status
+        self.status = StatusRelay(self)
+        self.queue_size = queue_size or self.QUEUE_SIZE
+        self._source: Optional[Callable[[], Iterable[Any]]] = None
+        self._stages: List[_Stage] = []
+        self._events: queue.Queue = queue.Queue(maxsize=self.queue_size * 4)
+        self._stopped = threading.Event()
+
+    def set_source(self, source: Callable[[], Iterable[Any]]) -> None:
+        """Set the callable returning the items fed to the first stage."""
+        self._source = source
+
+    def add_stage(
+        self, name: str, fn: Callable[[Any], Any], workers: int = 1
+    ) -> None:
+        """
+        Append a stage.
+
+        Args:
+            name (str): Stage name, used in logs.
+            fn (Callable): Called with each item; returns the next item or None.
+            workers (int): Threads running the stage; items may then leave it
+                out of order.
+        """
+        self._stages.append(_Stage(name, fn, workers))
+
+    def stop(self) -> None:
+        """Ask every worker to finish; items in flight are dropped."""
+        self._stopped.set()
+
+    def _put(self, target: queue.Queue, item: Any) -> bool:
+        while not self._stopped.is_set():
+            try:
+                target.put(item, timeout=self.POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _emit(self, kind: str, payload: Any) -> None:
+        self._put(self._events, (kind, payload))
+
+    def _run_source(self, outbox: queue.Queue) -> None:
+        try:
+            for item in self._source():
+                if not self._put(outbox, item):
+                    return
+        except Exception as e:
+            logger.exception("Streaming source failed")
+            self._emit("error", e)
+        finally:
+            self._put(outbox, _DONE)
+
+    def _run_stage(self, stage: _Stage, inbox: queue.Queue, outbox: queue.Queue):
+        try:
+            while not self._stopped.is_set():
+                try:
+                    item = inbox.get(timeout=self.POLL_SECONDS)
+                except queue.Empty:
+                    continue
+                if item is _DONE:
+                    # Let the stage's other workers see the end of the stream
+                    self._put(inbox, _DONE)
+                    break
+                result = stage.fn(item)
+                if result is not None and not self._put(outbox, result):
+                    return
+        except Exception as e:
+            logger.exception(f"Streaming stage '{stage.name}' failed")
+            self._emit("error", e)
+            self.stop()
+        finally:
+            with stage.lock:
+                stage.remaining -= 1
+                last = stage.remaining == 0
+            if last:
+                self._put(outbox, _DONE)
+
+    def _start(self, target: Callable, *args) -> threading.Thread:
+        context = contextvars.copy_context()
+        thread = threading.Thread(
+            target=context.run, args=(target, *args), daemon=True
+        )
+        thread.start()
+        return thread
+
+    def run(self) -> Iterator[Any]:
+        """
+        Start the workers and yield the items leaving the last stage.
+
+        Must be iterated on the Streamlit script thread: status messages from
+        the workers are written here. Closing the iterator stops the workers;
+        a failing stage stops them and its exception is raised here.
+        """
+        if self._source is None or not self._stages:
+            raise ValueError("StreamingPipeline needs a source and a stage")
+
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self._stages]
+        outboxes = queues[1:] + [_Results(self)]
+        threads = [self._start(self._run_source, queues[0])]
+        for stage, inbox, outbox in zip(self._stages, queues, outboxes):
+            for _ in range(stage.workers):
+                threads.append(self._start(self._run_stage, stage, inbox, outbox))
+
+        try:
+            while True:
+                try:
+                    kind, payload = self._events.get(timeout=self.POLL_SECONDS)
+                except queue.Empty:
+                    if self._stopped.is_set():
+                        break
+                    continue
+                if kind == "write":
+                    if self.target_status is not None:
+                        self.target_status.write(payload)
+                    else:
+                        logger.info(payload)
+                elif kind == "error":
+                    raise payload
+                elif kind == "done":
+                    break
+                else:
+                    yield payload
+        finally:
+            self.stop()
+            for thread in threads:
+                thread.join(timeout=self.POLL_SECONDS * 5)
+
+
+class _Results:
+    """Outbox of the last stage: hands items to ``run`` as events."""
+
+    def __init__(self, pipeline: StreamingPipeline) -> None:
+        self._pipeline = pipeline
+
+    def put(self, item: Any, timeout: Optional[float] = None) -> None:
+        if item is _DONE:
+            self._pipeline._events.put(("done", None), timeout=timeout)
+        else:
+            self._pipeline._events.put(("item", item), timeout=timeout)